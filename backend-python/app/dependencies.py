@@ -0,0 +1,22 @@
+"""
+FastAPI dependency providers for the application-lifespan singletons.
+
+The providers are async so FastAPI resolves them on the event loop rather
+than in its threadpool, which keeps the lazy singleton construction
+race-free when the first requests arrive concurrently.
+"""
+from app.services.batch_service import BatchJobManager, get_batch_manager
+from app.services.summary_service import SummaryService, get_summary_service
+from app.services.youtube_service import YouTubeService, get_youtube_service
+
+
+async def provide_summary_service() -> SummaryService:
+    return get_summary_service()
+
+
+async def provide_batch_manager() -> BatchJobManager:
+    return get_batch_manager()
+
+
+async def provide_youtube_service() -> YouTubeService:
+    return get_youtube_service()
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.batch_service import get_batch_manager
+from app.services.summary_service import get_summary_service
+from app.utils import metrics
+from app.utils.rate_limiter import get_rate_limiters
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def collect_runtime_metrics():
+    """Refresh gauges from components that keep their own counters"""
+    stats = get_summary_service().stats()
+    metrics.CACHE_HIT_RATIO.set(stats["cache"]["hit_rate"], cache="summary")
+    metrics.CACHE_HIT_RATIO.set(stats["transcript_store"]["hit_rate"], cache="transcript")
+    metrics.IN_FLIGHT_SUMMARIES.set(stats["single_flight"]["in_flight"])
+    for model, limiter in get_rate_limiters().items():
+        metrics.RATE_LIMIT_QUEUE_DEPTH.set(limiter.stats()["queue_depth"], model=model)
+    metrics.BATCH_QUEUE_DEPTH.set(get_batch_manager().stats()["queued"])
+
+metrics.REGISTRY.add_collector(collect_runtime_metrics)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint
+    """
+    return PlainTextResponse(metrics.render_latest(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,16 +1,23 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
+from app.services.summary_service import SummaryService
+from app.services.batch_service import BatchJobManager
+from app.services.model_router import get_model_router
 from app.services.youtube_service import YouTubeService
-from app.services.ai_service import AIService
+from app.dependencies import provide_batch_manager, provide_summary_service, provide_youtube_service
+from app.utils.rate_limiter import get_rate_limiters
+import json
 import logging
+import time
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 class SummaryRequest(BaseModel):
     video_url: str = Field(..., description="YouTube video URL", example="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
-    summary_type: Optional[str] = Field(default="detailed", description="Type of summary: detailed, brief, or bullet_points")
+    summary_type: Optional[Union[str, List[str]]] = Field(default="detailed", description="Type of summary: detailed, brief, bullet_points or timestamped, or a list of them (/summarize only)")
 
 class SummaryResponse(BaseModel):
     video_id: str
@@ -21,44 +28,81 @@ class SummaryResponse(BaseModel):
     transcript_length: int
     processing_time: float
     summary_type: str
+    cached: bool = Field(default=False, description="True when the summary was served from cache")
+    coalesced: bool = Field(default=False, description="True when the request joined an identical in-flight request")
+    chunk_count: int = Field(default=1, description="Number of transcript chunks summarized (>1 for map-reduce)")
+    stage_timings: Optional[Dict[str, float]] = Field(default=None, description="Seconds spent in each summarization stage")
+    transcript_source: Optional[str] = Field(default=None, description="Where the transcript came from: store, transcript_api or yt_dlp_subtitles")
+    fetch_timings: Optional[Dict[str, float]] = Field(default=None, description="Seconds spent in each video fetch phase")
+    token_estimate: Optional[Dict[str, int]] = Field(default=None, description="Estimated transcript tokens before (original) and after (normalized) preprocessing")
+    chapters: Optional[List[Dict[str, Any]]] = Field(default=None, description="Video chapters (title, start, end in seconds) used to structure long summaries")
+    routing: Optional[Dict[str, Any]] = Field(default=None, description="Model tier and model chosen, failovers, and per-model calls, latency, tokens and estimated cost")
+    derived_from: Optional[str] = Field(default=None, description="Summary type this one was condensed from instead of the transcript (detailed)")
+    generated_with: Optional[List[str]] = Field(default=None, description="Summary types produced together by the same model call")
 
-@router.post("/summarize", response_model=SummaryResponse)
-async def create_summary(request: SummaryRequest):
+class MultiSummaryResponse(BaseModel):
+    video_id: str
+    title: str
+    duration: int
+    thumbnail: str
+    processing_time: float
+    summaries: Dict[str, SummaryResponse] = Field(..., description="One summary per requested summary_type")
+
+class BatchRequest(BaseModel):
+    video_urls: Optional[List[str]] = Field(default=None, description="YouTube video URLs to summarize")
+    playlist_url: Optional[str] = Field(default=None, description="YouTube playlist URL to expand into videos")
+    summary_type: Optional[str] = Field(default="detailed", description="Type of summary: detailed, brief, bullet_points or timestamped")
+
+class BatchItem(BaseModel):
+    index: int
+    video_url: str
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class BatchJobResponse(BaseModel):
+    job_id: str
+    status: str
+    summary_type: str
+    total: int
+    completed: int
+    failed: int
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float] = None
+    items: List[BatchItem]
+
+@router.post("/summarize", response_model=Union[SummaryResponse, MultiSummaryResponse])
+async def create_summary(
+    request: SummaryRequest,
+    summary_service: SummaryService = Depends(provide_summary_service)
+):
     """
-    Generate AI-powered summary from YouTube video URL
+    Generate AI-powered summary from YouTube video URL.
+    With a list of summary types, returns every one of them under
+    "summaries"; uncached types are generated together where possible.
     """
     try:
         logger.info(f"Processing video: {request.video_url}")
         
-        # Fetch video data and transcript
-        youtube_service = YouTubeService()
-        video_data = await youtube_service.get_video_data(request.video_url)
-        
-        if not video_data:
-            raise HTTPException(status_code=400, detail="Could not fetch video data")
-        
-        logger.info(f"Video data fetched: {video_data['title']}")
-        
-        # Generate AI summary
-        ai_service = AIService()
-        summary = await ai_service.generate_summary(
-            transcript=video_data["transcript"],
-            summary_type=request.summary_type,
-            video_title=video_data["title"]
-        )
-        
-        logger.info(f"Summary generated successfully")
+        if isinstance(request.summary_type, list):
+            if not request.summary_type:
+                raise ValueError("summary_type list must not be empty")
+            start_time = time.time()
+            results = await summary_service.summarize_many(request.video_url, request.summary_type)
+            first = next(iter(results.values()))
+            return MultiSummaryResponse(
+                video_id=first["video_id"],
+                title=first["title"],
+                duration=first["duration"],
+                thumbnail=first["thumbnail"],
+                processing_time=round(time.time() - start_time, 2),
+                summaries={summary_type: SummaryResponse(**result) for summary_type, result in results.items()}
+            )
+
+        result = await summary_service.summarize(request.video_url, request.summary_type)
         
-        return SummaryResponse(
-            video_id=video_data["video_id"],
-            title=video_data["title"],
-            duration=video_data["duration"],
-            thumbnail=video_data["thumbnail"],
-            summary=summary["text"],
-            transcript_length=len(video_data["transcript"]),
-            processing_time=summary["processing_time"],
-            summary_type=request.summary_type
-        )
+        return SummaryResponse(**result)
         
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
@@ -68,4 +112,110 @@ async def create_summary(request: SummaryRequest):
         raise HTTPException(status_code=429, detail="AI Service is currently overloaded. Please try again later.")
     except Exception as e:
         logger.error(f"Error generating summary: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate summary: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to generate summary: {str(e)}")
+
+@router.post("/summarize/stream")
+async def stream_summary(
+    request: SummaryRequest,
+    summary_service: SummaryService = Depends(provide_summary_service)
+):
+    """
+    Generate a summary as a Server-Sent Events stream.
+
+    Events: video_id, metadata, transcript, map_complete (long videos only),
+    token (one per streamed model chunk), summary (final payload, same shape
+    as /summarize) or error ({"status_code", "detail"}).
+    """
+    logger.info(f"Streaming summary for video: {request.video_url}")
+
+    async def event_stream():
+        try:
+            summary_type = request.summary_type
+            if isinstance(summary_type, list):
+                if len(summary_type) != 1:
+                    raise ValueError("Streaming supports a single summary_type")
+                summary_type = summary_type[0]
+            async for event in summary_service.stream(request.video_url, summary_type):
+                yield _sse(event["event"], event["data"])
+        except ValueError as e:
+            logger.error(f"Validation error: {str(e)}")
+            yield _sse("error", {"status_code": 400, "detail": str(e)})
+        except ResourceWarning as e:
+            logger.error(f"Rate limit exceeded: {str(e)}")
+            yield _sse("error", {"status_code": 429, "detail": "AI Service is currently overloaded. Please try again later."})
+        except Exception as e:
+            logger.error(f"Error streaming summary: {str(e)}")
+            yield _sse("error", {"status_code": 500, "detail": f"Failed to generate summary: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop reverse proxies (nginx) from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/summarize/batch", status_code=202)
+async def create_batch(
+    request: BatchRequest,
+    batch_manager: BatchJobManager = Depends(provide_batch_manager),
+    youtube_service: YouTubeService = Depends(provide_youtube_service)
+):
+    """
+    Queue a batch of videos (explicit URLs and/or a playlist) for summarization.
+    Returns a job id to poll at /summarize/batch/{job_id}.
+    """
+    try:
+        video_urls = list(request.video_urls or [])
+
+        if request.playlist_url:
+            video_urls += await youtube_service.expand_playlist(request.playlist_url, batch_manager.max_items)
+
+        job = await batch_manager.submit(video_urls, request.summary_type)
+
+        return {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "total": job["total"],
+            "status_url": f"/api/v1/summarize/batch/{job['job_id']}"
+        }
+
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to create batch: {str(e)}")
+
+@router.get("/summarize/batch/{job_id}", response_model=BatchJobResponse)
+async def get_batch(
+    job_id: str,
+    batch_manager: BatchJobManager = Depends(provide_batch_manager)
+):
+    """
+    Batch job status with per-item results
+    """
+    job = await batch_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return BatchJobResponse(**job)
+
+@router.get("/stats")
+async def get_stats(
+    summary_service: SummaryService = Depends(provide_summary_service),
+    batch_manager: BatchJobManager = Depends(provide_batch_manager)
+):
+    """
+    Cache and request-coalescing counters for the summarize pipeline
+    """
+    stats = summary_service.stats()
+    stats["batch"] = batch_manager.stats()
+    stats["rate_limiter"] = {model: limiter.stats() for model, limiter in get_rate_limiters().items()}
+    stats["model_router"] = get_model_router().stats()
+    return stats
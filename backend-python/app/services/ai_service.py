@@ -1,11 +1,31 @@
+import asyncio
+import json
 import os
 import time
-from typing import Dict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import google.generativeai as genai
 import logging
+from app.services.model_router import Route, get_model_name, get_model_router
+from app.utils.rate_limiter import backoff_delay, get_rate_limiter, parse_retry_after
+from app.utils.metrics import GEMINI_COST, GEMINI_LATENCY, GEMINI_REQUESTS, GEMINI_TOKENS, MODEL_FAILOVERS, TRANSCRIPT_TOKENS
+from app.utils.tracing import span
+from app.utils.transcript import CHARS_PER_TOKEN, Transcript, format_timestamp
+from app.utils.transcript_normalizer import get_transcript_normalizer
 
 logger = logging.getLogger(__name__)
 
+# Summary types one structured call can produce together
+MULTI_FORMAT_TYPES = ("detailed", "brief", "bullet_points")
+# Summary types that can be derived from a detailed summary instead of the transcript
+DERIVABLE_TYPES = ("brief", "bullet_points")
+
+# Per-format instructions for the structured multi-format prompt
+FORMAT_INSTRUCTIONS = {
+    "detailed": "a comprehensive summary in clear paragraphs covering the main topic and key points, important details and examples, and conclusions or takeaways",
+    "brief": "a concise 2-3 paragraph summary focused on the main message and key takeaways only",
+    "bullet_points": "bullet points, one per line starting with a simple dash (-): the main topic, 3-5 key points and the important takeaways"
+}
+
 class AIService:
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_API_KEY")
@@ -16,19 +36,345 @@ class AIService:
         genai.configure(api_key=self.api_key)
         
         # Use env var for model or default to gemini-2.5-flash
-        model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
-        self.model = genai.GenerativeModel(model_name)
+        model_name = get_model_name()
+        self.model_name = model_name
+        # One GenerativeModel per model name; the router picks between them
+        self._models: Dict[str, genai.GenerativeModel] = {}
+        self.model = self._model(model_name)
+        self.router = get_model_router()
         logger.info(f"Gemini AI initialized successfully with {model_name}")
+
+        # Map-reduce settings for long transcripts
+        self.chunk_threshold = int(os.getenv("AI_CHUNK_THRESHOLD_CHARS", 120000))
+        self.chunk_size_tokens = int(os.getenv("AI_CHUNK_SIZE_TOKENS", 8000))
+        self.chunk_concurrency = int(os.getenv("AI_CHUNK_CONCURRENCY", 4))
+        # Map levels at most, counting the first pass over the transcript
+        self.chunk_max_levels = int(os.getenv("AI_CHUNK_MAX_LEVELS", 3))
+        # 0 = chunk by size (or by chapter when the video has chapters)
+        self.chunk_seconds = float(os.getenv("AI_CHUNK_SECONDS", 0))
+        # Spacing of [m:ss] markers in prompts for timestamped summaries
+        self.timestamp_interval = float(os.getenv("AI_TIMESTAMP_INTERVAL", 30))
+        # Marker/filler/rolling-caption cleanup applied before prompting
+        self.normalizer = get_transcript_normalizer()
+
+        # Quota handling: per-model throttle, failover to the next model on
+        # 429 or timeout, then retry with backoff once every model is throttled
+        self.call_timeout = float(os.getenv("GEMINI_TIMEOUT", 120))
+        self.max_retries = int(os.getenv("GEMINI_MAX_RETRIES", 3))
+        self.backoff_base = float(os.getenv("GEMINI_BACKOFF_BASE", 1.0))
+        self.backoff_max = float(os.getenv("GEMINI_BACKOFF_MAX", 30.0))
     
     async def generate_summary(
         self, 
-        transcript: str, 
+        transcript: Transcript, 
         summary_type: str = "detailed",
         video_title: str = ""
     ) -> Dict:
-        """Generate AI summary of video transcript"""
+        """
+        Generate AI summary of video transcript.
+        The transcript is normalized first; transcripts still longer than
+        AI_CHUNK_THRESHOLD_CHARS are summarized hierarchically (map over
+        chunks, then reduce).
+        """
         start_time = time.time()
-        
+        transcript, token_estimate, normalize_time = self._normalize(transcript)
+        route = self.router.route(token_estimate["normalized"], summary_type)
+
+        if transcript.char_count > self.chunk_threshold:
+            result = await self._generate_chunked(transcript, summary_type, video_title, start_time, route)
+        else:
+            prompt = self._build_prompt(summary_type, video_title, self._prompt_text(transcript, summary_type))
+
+            logger.info(f"Generating {summary_type} summary with {route.model} ({route.tier})...")
+            generate_start = time.time()
+            with span("gemini.generate_summary", summary_type=summary_type, model=route.model):
+                summary_text = await self._generate(prompt, route)
+            generate_time = time.time() - generate_start
+
+            processing_time = time.time() - start_time
+            logger.info(f"Summary generated in {processing_time:.2f}s")
+
+            result = {
+                "text": summary_text,
+                "processing_time": round(processing_time, 2),
+                "chunk_count": 1,
+                "stage_timings": {"generate": round(generate_time, 2)}
+            }
+
+        result["stage_timings"]["normalize"] = round(normalize_time, 4)
+        result["token_estimate"] = token_estimate
+        result["routing"] = route.report()
+        return result
+
+    async def stream_summary(
+        self,
+        transcript: Transcript,
+        summary_type: str = "detailed",
+        video_title: str = ""
+    ) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of generate_summary.
+        Yields {"event", "data"} dicts: "map_complete" after the map stage of
+        long transcripts, "token" for each streamed text chunk, and a final
+        "summary_complete" with the full text and timings.
+        """
+        start_time = time.time()
+        chunk_count = 1
+        transcript, token_estimate, normalize_time = self._normalize(transcript)
+        route = self.router.route(token_estimate["normalized"], summary_type)
+        stage_timings = {"normalize": round(normalize_time, 4)}
+        source = "Transcript"
+
+        if transcript.char_count > self.chunk_threshold:
+            map_start = time.time()
+            with span("gemini.map", model=route.model):
+                source_text, chunk_count = await self._map_chunks(transcript, video_title, summary_type, route)
+            stage_timings["map"] = round(time.time() - map_start, 2)
+            source = "Section summaries"
+            yield {"event": "map_complete", "data": {"chunk_count": chunk_count, "seconds": stage_timings["map"]}}
+        else:
+            source_text = self._prompt_text(transcript, summary_type)
+
+        prompt = self._build_prompt(summary_type, video_title, source_text, source=source)
+
+        logger.info(f"Streaming {summary_type} summary with {route.model} ({route.tier})...")
+        stage_start = time.time()
+        parts = []
+        async for text in self._generate_stream(prompt, route):
+            parts.append(text)
+            yield {"event": "token", "data": {"text": text}}
+        stage_timings["reduce" if chunk_count > 1 else "generate"] = round(time.time() - stage_start, 2)
+
+        processing_time = time.time() - start_time
+        logger.info(f"Streamed summary generated in {processing_time:.2f}s")
+
+        yield {
+            "event": "summary_complete",
+            "data": {
+                "text": "".join(parts),
+                "processing_time": round(processing_time, 2),
+                "chunk_count": chunk_count,
+                "stage_timings": stage_timings,
+                "token_estimate": token_estimate,
+                "routing": route.report()
+            }
+        }
+
+    async def generate_summaries(
+        self,
+        transcript: Transcript,
+        summary_types: List[str],
+        video_title: str = ""
+    ) -> Dict:
+        """
+        Generate several of MULTI_FORMAT_TYPES from one pass over the
+        transcript: a single structured (JSON) call returns every requested
+        format. Long transcripts are mapped once and the section summaries
+        feed that call. Returns the same fields as generate_summary with
+        "texts" ({summary_type: text}) in place of "text".
+        """
+        start_time = time.time()
+        transcript, token_estimate, normalize_time = self._normalize(transcript)
+        route = self.router.route(token_estimate["normalized"], "detailed")
+        stage_timings = {"normalize": round(normalize_time, 4)}
+        chunk_count = 1
+        source = "Transcript"
+
+        if transcript.char_count > self.chunk_threshold:
+            map_start = time.time()
+            with span("gemini.map", model=route.model):
+                source_text, chunk_count = await self._map_chunks(transcript, video_title, "detailed", route)
+            stage_timings["map"] = round(time.time() - map_start, 2)
+            source = "Section summaries"
+        else:
+            source_text = transcript.text
+
+        logger.info(f"Generating {', '.join(summary_types)} summaries in one call with {route.model} ({route.tier})...")
+        stage_start = time.time()
+        prompt = self._build_multi_prompt(summary_types, video_title, source_text, source)
+        with span("gemini.generate_summaries", summary_types=",".join(summary_types), model=route.model):
+            texts = self._parse_formats(await self._generate(prompt, route, json_output=True), summary_types)
+
+            # Formats missing from the reply fall back to their own prompt over the same source
+            missing = [summary_type for summary_type in summary_types if summary_type not in texts]
+            if missing:
+                logger.warning(f"Structured reply lacked {missing}, generating them separately")
+                fallback = await asyncio.gather(*(
+                    self._generate(self._build_prompt(summary_type, video_title, source_text, source=source), route)
+                    for summary_type in missing
+                ))
+                texts.update(zip(missing, fallback))
+        stage_timings["reduce" if chunk_count > 1 else "generate"] = round(time.time() - stage_start, 2)
+
+        processing_time = time.time() - start_time
+        logger.info(f"{len(summary_types)} summaries generated in {processing_time:.2f}s")
+
+        return {
+            "texts": texts,
+            "processing_time": round(processing_time, 2),
+            "chunk_count": chunk_count,
+            "stage_timings": stage_timings,
+            "token_estimate": token_estimate,
+            "routing": route.report()
+        }
+
+    async def derive_summary(self, detailed_summary: str, summary_type: str, video_title: str = "") -> Dict:
+        """
+        Produce a DERIVABLE_TYPES summary from an existing detailed summary,
+        a prompt a fraction of the transcript's size
+        """
+        start_time = time.time()
+        route = self.router.route(len(detailed_summary) // CHARS_PER_TOKEN, summary_type)
+        prompt = self._build_prompt(summary_type, video_title, detailed_summary, source="Detailed summary")
+
+        logger.info(f"Deriving {summary_type} summary from the detailed one with {route.model}...")
+        with span("gemini.derive_summary", summary_type=summary_type, model=route.model):
+            summary_text = await self._generate(prompt, route)
+        processing_time = time.time() - start_time
+
+        return {
+            "text": summary_text,
+            "processing_time": round(processing_time, 2),
+            "chunk_count": 1,
+            "stage_timings": {"derive": round(processing_time, 2)},
+            "routing": route.report()
+        }
+
+    async def _generate_chunked(
+        self,
+        transcript: Transcript,
+        summary_type: str,
+        video_title: str,
+        start_time: float,
+        route: Route
+    ) -> Dict:
+        """Map-reduce summarization for transcripts that are too long for one prompt"""
+        # MAP: summarize chunks concurrently, bounded by AI_CHUNK_CONCURRENCY
+        map_start = time.time()
+        with span("gemini.map", model=route.model):
+            combined, chunk_count = await self._map_chunks(transcript, video_title, summary_type, route)
+        map_time = time.time() - map_start
+
+        # REDUCE: produce the requested summary type from the section summaries
+        reduce_start = time.time()
+        prompt = self._build_prompt(summary_type, video_title, combined, source="Section summaries")
+        with span("gemini.reduce", summary_type=summary_type, model=route.model):
+            summary_text = await self._generate(prompt, route)
+        reduce_time = time.time() - reduce_start
+
+        processing_time = time.time() - start_time
+        logger.info(
+            f"Chunked summary generated in {processing_time:.2f}s "
+            f"({chunk_count} chunks, map {map_time:.2f}s, reduce {reduce_time:.2f}s)"
+        )
+
+        return {
+            "text": summary_text,
+            "processing_time": round(processing_time, 2),
+            "chunk_count": chunk_count,
+            "stage_timings": {
+                "map": round(map_time, 2),
+                "reduce": round(reduce_time, 2)
+            }
+        }
+
+    async def _map_chunks(self, transcript: Transcript, video_title: str, summary_type: str, route: Route) -> Tuple[str, int]:
+        """
+        MAP stage: summarize transcript chunks and return the combined
+        section summaries together with the number of first-level chunks.
+        Chunks follow the video's chapters when it has any, otherwise
+        AI_CHUNK_SECONDS windows or AI_CHUNK_SIZE_TOKENS-sized groups.
+        """
+        timestamped = summary_type == "timestamped"
+        timestamp_every = self.timestamp_interval if timestamped else 0
+        budget_chars = self.chunk_size_tokens * CHARS_PER_TOKEN
+        if self.chunk_seconds and not transcript.chapters:
+            chunks = transcript.chunk_by_time(self.chunk_seconds, timestamp_every)
+        else:
+            chunks = transcript.chunk_by_chapters(budget_chars, timestamp_every)
+        logger.info(
+            f"Transcript of {transcript.char_count} chars split into {len(chunks)} chunks"
+            f"{' by chapter' if transcript.chapters else ''}"
+        )
+
+        partials = await self._summarize_chunks(chunks, video_title, route, timestamped)
+        combined = "\n\n".join(partials)
+
+        # Collapse further while the partial summaries are still too long, up
+        # to AI_CHUNK_MAX_LEVELS and only while a level makes the text shorter
+        levels = 1
+        while len(combined) > self.chunk_threshold and len(partials) > 1 and levels < self.chunk_max_levels:
+            levels += 1
+            collapsed = await self._summarize_chunks(self._split_text(combined), video_title, route, timestamped)
+            collapsed_text = "\n\n".join(collapsed)
+            if len(collapsed_text) >= len(combined):
+                logger.warning(f"Map level {levels} did not shrink the section summaries ({len(collapsed_text)} chars), stopping")
+                break
+            partials, combined = collapsed, collapsed_text
+
+        if len(combined) > self.chunk_threshold:
+            logger.warning(f"Section summaries still {len(combined)} chars after {levels} level(s), truncating")
+            combined = combined[:self.chunk_threshold]
+
+        logger.info(f"Map stage finished after {levels} level(s)")
+        return combined, len(chunks)
+
+    async def _summarize_chunks(self, chunks: List[Dict], video_title: str, route: Route, timestamped: bool = False) -> List[str]:
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+        total = len(chunks)
+        keep_timestamps = " Start each point with the [m:ss] timestamp where it is discussed." if timestamped else ""
+
+        async def summarize(index: int, chunk: Dict) -> str:
+            async with semaphore:
+                label = f"Part {index + 1} of {total}"
+                if chunk.get("title"):
+                    label += f' "{chunk["title"]}"'
+                if chunk.get("start") is not None:
+                    label += f" ({format_timestamp(chunk['start'])} - {format_timestamp(chunk['end'])})"
+                prompt = f"""{label} of the transcript of the YouTube video titled "{video_title}" follows. Summarize this part in plain text without any markdown, keeping the key points, facts, examples and conclusions so it can later be merged with summaries of the other parts.{keep_timestamps}
+
+Transcript:
+{chunk["text"]}"""
+                text = await self._generate(prompt, route)
+                return f"{label}:\n{text.strip()}"
+
+        return await asyncio.gather(*(summarize(i, chunk) for i, chunk in enumerate(chunks)))
+
+    def _split_text(self, text: str) -> List[Dict]:
+        """Split plain text into chunks of at most AI_CHUNK_SIZE_TOKENS on whitespace boundaries"""
+        budget_chars = self.chunk_size_tokens * CHARS_PER_TOKEN
+        chunks = []
+        position = 0
+
+        while position < len(text):
+            end = min(position + budget_chars, len(text))
+            if end < len(text):
+                boundary = text.rfind(" ", position, end)
+                if boundary > position:
+                    end = boundary
+            chunks.append({"text": text[position:end].strip(), "start": None, "end": None})
+            position = end
+
+        return [chunk for chunk in chunks if chunk["text"]]
+
+    def _normalize(self, transcript: Transcript) -> Tuple[Transcript, Dict[str, int], float]:
+        """Clean the transcript for prompting; returns it with the before/after token estimate and seconds taken"""
+        start = time.time()
+        with span("transcript.normalize"):
+            transcript, token_estimate = self.normalizer.normalize(transcript)
+        TRANSCRIPT_TOKENS.inc(token_estimate["original"], stage="original")
+        TRANSCRIPT_TOKENS.inc(token_estimate["normalized"], stage="normalized")
+        logger.info(f"Transcript normalized: ~{token_estimate['original']} -> ~{token_estimate['normalized']} tokens")
+        return transcript, token_estimate, time.time() - start
+
+    def _prompt_text(self, transcript: Transcript, summary_type: str) -> str:
+        """Transcript text for a single-prompt summary; timestamped summaries get [m:ss] markers"""
+        if summary_type == "timestamped":
+            return transcript.render(timestamp_every=self.timestamp_interval)
+        return transcript.text
+
+    @staticmethod
+    def _build_prompt(summary_type: str, video_title: str, transcript: str, source: str = "Transcript") -> str:
         prompts = {
             "detailed": f"""Provide a comprehensive summary of this YouTube video titled "{video_title}" in plain text format without any markdown, bold text, or special formatting.
 
@@ -39,14 +385,14 @@ Include:
 
 Write in clear paragraphs using only plain text.
 
-Transcript:
+{source}:
 {transcript}""",
 
             "brief": f"""Provide a concise 2-3 paragraph summary of this YouTube video titled "{video_title}" in plain text format without any markdown, bold text, or special formatting.
 
 Focus on the main message and key takeaways only. Write in clear paragraphs using only plain text.
 
-Transcript:
+{source}:
 {transcript}""",
 
             "bullet_points": f"""Summarize this YouTube video titled "{video_title}" as bullet points in plain text format without any markdown or special formatting.
@@ -58,34 +404,225 @@ Format:
 
 Use simple dashes (-) for bullet points, no special characters.
 
-Transcript:
+{source}:
+{transcript}""",
+
+            "timestamped": f"""Summarize this YouTube video titled "{video_title}" as timestamped bullet points in plain text format without any markdown or special formatting.
+
+The text below contains [m:ss] markers showing when each part is spoken. Write one bullet per key point or topic change, in the order they occur, starting each bullet with the timestamp where it begins, for example:
+- [3:15] Key point
+
+Use simple dashes (-) for bullet points, no special characters.
+
+{source}:
 {transcript}"""
         }
         
-        prompt = prompts.get(summary_type, prompts["detailed"])
-        
+        return prompts.get(summary_type, prompts["detailed"])
+
+    @staticmethod
+    def _build_multi_prompt(summary_types: List[str], video_title: str, transcript: str, source: str = "Transcript") -> str:
+        formats = "\n".join(f'- "{summary_type}": {FORMAT_INSTRUCTIONS[summary_type]}' for summary_type in summary_types)
+        return f"""Summarize this YouTube video titled "{video_title}" in {len(summary_types)} formats at once.
+
+Reply with a JSON object with exactly these keys, each value a plain-text string without any markdown, bold text, or special formatting:
+{formats}
+
+{source}:
+{transcript}"""
+
+    @staticmethod
+    def _parse_formats(text: str, summary_types: List[str]) -> Dict[str, str]:
+        """Requested formats found in a structured reply; anything unparseable is left out"""
         try:
-            logger.info(f"Generating {summary_type} summary with Gemini...")
-            
-            # Generate content using the model
-            response = self.model.generate_content(prompt)
-            summary_text = response.text
-            
-            processing_time = time.time() - start_time
-            logger.info(f"Summary generated in {processing_time:.2f}s")
-            
-            return {
-                "text": summary_text,
-                "processing_time": round(processing_time, 2)
-            }
-            
-        except Exception as e:
-            # Check for Resource Exhausted (429)
-            error_str = str(e)
-            if "429" in error_str or "Resource has been exhausted" in error_str:
-                logger.error(f"AI Rate Limit Reached: {error_str}")
-                # Re-raise as a distinct error that the route handler can catch
-                raise ResourceWarning(f"AI Service overloaded (429): {error_str}")
-            
-            logger.error(f"AI generation error: {str(e)}")
-            raise ValueError(f"Failed to generate summary: {str(e)}")
\ No newline at end of file
+            data = json.loads(text)
+        except ValueError:
+            # Tolerate code fences or prose around the object
+            start, end = text.find("{"), text.rfind("}")
+            try:
+                data = json.loads(text[start:end + 1]) if 0 <= start < end else {}
+            except ValueError:
+                data = {}
+        if not isinstance(data, dict):
+            return {}
+        # Key order does not matter; stray whitespace or capitals in keys are tolerated
+        data = {str(key).strip().lower(): value for key, value in data.items()}
+        return {
+            summary_type: data[summary_type].strip()
+            for summary_type in summary_types
+            if isinstance(data.get(summary_type), str) and data[summary_type].strip()
+        }
+
+    async def _generate(self, prompt: str, route: Route, json_output: bool = False) -> str:
+        """
+        Run one Gemini call on the route's first model, failing over to the
+        next candidate on a 429 or timeout. Once every candidate has been
+        throttled the round is retried with backoff; quota errors that
+        outlast the retries become ResourceWarning. json_output asks the model
+        for a JSON reply.
+        """
+        tokens = self._estimate_tokens(prompt)
+        generation_config = {"response_mime_type": "application/json"} if json_output else None
+        for attempt in range(self.max_retries + 1):
+            for position, model_name in enumerate(route.models):
+                limiter = get_rate_limiter(model_name)
+                await limiter.acquire(tokens)
+                call_start = time.time()
+                try:
+                    with span("gemini.call", model=model_name, attempt=attempt):
+                        response = await asyncio.wait_for(
+                            self._model(model_name).generate_content_async(prompt, generation_config=generation_config),
+                            self.call_timeout
+                        )
+                    limiter.record_success()
+                    self._record_usage(response, model_name, time.time() - call_start, route)
+                    return response.text
+                except Exception as e:
+                    self._failover(e, route, position, attempt)
+            await self._backoff(route, attempt)
+
+    async def _generate_stream(self, prompt: str, route: Route) -> AsyncIterator[str]:
+        """
+        Stream one Gemini call chunk by chunk. Fails over and retries like
+        _generate, but only while nothing has been yielded yet; the timeout
+        covers the wait for the first chunk.
+        """
+        tokens = self._estimate_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            for position, model_name in enumerate(route.models):
+                limiter = get_rate_limiter(model_name)
+                await limiter.acquire(tokens)
+                call_start = time.time()
+                started = False
+                last_chunk = None
+                try:
+                    # Resolves once the first chunk has arrived
+                    response = await asyncio.wait_for(
+                        self._model(model_name).generate_content_async(prompt, stream=True), self.call_timeout
+                    )
+                    async for chunk in response:
+                        last_chunk = chunk
+                        text = self._chunk_text(chunk)
+                        if text:
+                            started = True
+                            yield text
+                    limiter.record_success()
+                    # Usage totals arrive on the final chunk
+                    self._record_usage(last_chunk, model_name, time.time() - call_start, route)
+                    return
+                except Exception as e:
+                    if started:
+                        GEMINI_REQUESTS.inc(model=model_name, outcome="error")
+                        raise self._translate_error(e)
+                    self._failover(e, route, position, attempt)
+            await self._backoff(route, attempt)
+
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """
+        Text of a streamed chunk. chunk.text raises ValueError when a chunk
+        has no parts (the final usage/finish_reason chunk, a safety stop)
+        """
+        try:
+            parts = chunk.parts
+        except ValueError:
+            # No candidate at all, e.g. a usage-only chunk
+            return ""
+        return "".join(part.text for part in parts if getattr(part, "text", ""))
+
+    def _model(self, model_name: str) -> genai.GenerativeModel:
+        model = self._models.get(model_name)
+        if model is None:
+            model = self._models[model_name] = genai.GenerativeModel(model_name)
+        return model
+
+    def _record_usage(self, response, model_name: str, seconds: float, route: Route):
+        """Count prompt/response tokens reported by Gemini, call latency and estimated cost"""
+        GEMINI_REQUESTS.inc(model=model_name, outcome="success")
+        GEMINI_LATENCY.observe(seconds, model=model_name)
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        response_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        GEMINI_TOKENS.inc(prompt_tokens, kind="prompt", model=model_name)
+        GEMINI_TOKENS.inc(response_tokens, kind="response", model=model_name)
+        cost = self.router.cost(model_name, prompt_tokens, response_tokens)
+        if cost is not None:
+            GEMINI_COST.inc(cost, model=model_name)
+        route.record_call(model_name, seconds, prompt_tokens, response_tokens, cost)
+
+    def _failover(self, e: Exception, route: Route, position: int, attempt: int):
+        """
+        Handle a failed call on route.models[position]: 429s pause that
+        model's limiter and timeouts are noted, then the caller moves on to
+        the next candidate. Any other error is raised.
+        """
+        model_name = route.models[position]
+        timed_out = isinstance(e, asyncio.TimeoutError)
+        if not timed_out and not self._is_rate_limit(e):
+            GEMINI_REQUESTS.inc(model=model_name, outcome="error")
+            raise self._translate_error(e)
+
+        reason = "timeout" if timed_out else "rate_limited"
+        GEMINI_REQUESTS.inc(model=model_name, outcome=reason)
+        if not timed_out:
+            retry_after = parse_retry_after(e)
+            limiter = get_rate_limiter(model_name)
+            limiter.record_throttle(retry_after if retry_after is not None else backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+        route.last_error = e
+        if position + 1 < len(route.models):
+            next_model = route.models[position + 1]
+            MODEL_FAILOVERS.inc(from_model=model_name, to_model=next_model, reason=reason)
+            route.record_failover(model_name, next_model, reason)
+            logger.warning(f"Gemini {model_name} {reason.replace('_', ' ')}, failing over to {next_model}")
+
+    async def _backoff(self, route: Route, attempt: int):
+        """Every candidate was throttled or timed out: sleep before the next round, or give up"""
+        e = route.last_error
+        if attempt >= self.max_retries:
+            raise self._translate_error(e)
+
+        retry_after = parse_retry_after(e)
+        delay = retry_after if retry_after is not None else backoff_delay(attempt, self.backoff_base, self.backoff_max)
+        for model_name in route.models:
+            get_rate_limiter(model_name).retries += 1
+        logger.warning(f"All Gemini models throttled, retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})")
+        await asyncio.sleep(delay)
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        return len(text) // CHARS_PER_TOKEN
+
+    @staticmethod
+    def _is_rate_limit(e: Exception) -> bool:
+        error_str = str(e)
+        return "429" in error_str or "Resource has been exhausted" in error_str
+
+    @classmethod
+    def _translate_error(cls, e: Exception) -> Exception:
+        # Check for Resource Exhausted (429)
+        error_str = str(e)
+        if isinstance(e, asyncio.TimeoutError):
+            logger.error("AI request timed out")
+            return ResourceWarning("AI Service timed out")
+        if cls._is_rate_limit(e):
+            logger.error(f"AI Rate Limit Reached: {error_str}")
+            # Re-raise as a distinct error that the route handler can catch
+            return ResourceWarning(f"AI Service overloaded (429): {error_str}")
+        
+        logger.error(f"AI generation error: {str(e)}")
+        return ValueError(f"Failed to generate summary: {str(e)}")
+
+
+_ai_service: Optional[AIService] = None
+
+
+def get_ai_service() -> AIService:
+    """
+    Return the process-wide AIService (genai is configured and the model
+    built once). Raises ValueError while GOOGLE_API_KEY is missing.
+    """
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = AIService()
+    return _ai_service
@@ -0,0 +1,276 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from app.services.summary_service import SummaryService, get_summary_service
+from app.utils.rate_limiter import PRIORITY_BATCH, priority
+from app.utils.shared_state import SharedState, get_shared_state
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore(ABC):
+    """
+    Storage interface for batch jobs.
+    Workers only pass (job_id, index) pairs around and keep all state here,
+    so a persistent store (SQLite, Redis) can replace InMemoryJobStore
+    without touching the manager. Methods are async so stores backed by
+    blocking I/O keep it off the event loop.
+    """
+
+    @abstractmethod
+    async def create(self, job: Dict):
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def update_item(self, job_id: str, index: int, **fields):
+        ...
+
+    @abstractmethod
+    async def prune(self, max_age: int):
+        ...
+
+
+def apply_status_change(job: Dict, previous: str, status: str) -> Dict:
+    """Keep the job-level counters and status in step with an item moving from previous to status"""
+    if previous != status:
+        if status == "succeeded":
+            job["completed"] += 1
+        elif status == "failed":
+            job["failed"] += 1
+
+    if job["completed"] + job["failed"] == job["total"]:
+        job["status"] = "completed"
+        job["finished_at"] = time.time()
+    elif job["status"] == "queued":
+        job["status"] = "running"
+    job["updated_at"] = time.time()
+    return job
+
+
+class InMemoryJobStore(JobStore):
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+
+    async def create(self, job: Dict):
+        self._jobs[job["job_id"]] = job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return self._jobs.get(job_id)
+
+    async def update_item(self, job_id: str, index: int, **fields):
+        job = self._jobs.get(job_id)
+        if job:
+            item = job["items"][index]
+            previous = item["status"]
+            item.update(fields)
+            apply_status_change(job, previous, item["status"])
+
+    async def prune(self, max_age: int):
+        cutoff = time.time() - max_age
+        for job_id in [
+            job_id for job_id, job in self._jobs.items()
+            if job.get("finished_at") and job["finished_at"] < cutoff
+        ]:
+            del self._jobs[job_id]
+
+
+class SharedJobStore(JobStore):
+    """
+    Jobs kept in the shared state so any worker process can report on a
+    job; items still run in the process that accepted the job. The job
+    header (counters and status) and each item are separate rows, so an
+    item update writes that item's result and the small header only.
+    Every row of a job expires ttl seconds after its last update.
+    """
+
+    def __init__(self, shared_state: SharedState, ttl: int):
+        self.shared_state = shared_state
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"batch:{job_id}"
+
+    @staticmethod
+    def _item_prefix(job_id: str) -> str:
+        return f"batch:{job_id}:item:"
+
+    def _item_key(self, job_id: str, index: int) -> str:
+        # Zero-padded so a prefix scan returns items in order
+        return f"{self._item_prefix(job_id)}{index:06d}"
+
+    async def create(self, job: Dict):
+        header = {key: value for key, value in job.items() if key != "items"}
+        rows = {self._item_key(job["job_id"], item["index"]): item for item in job["items"]}
+        rows[self._key(job["job_id"])] = header
+        await asyncio.to_thread(self.shared_state.set_many, rows, self.ttl)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    def _get(self, job_id: str) -> Optional[Dict]:
+        job = self.shared_state.get(self._key(job_id))
+        if job is None:
+            return None
+        items = self.shared_state.get_prefix(self._item_prefix(job_id))
+        job["items"] = [items[key] for key in sorted(items)]
+        return job
+
+    async def update_item(self, job_id: str, index: int, **fields):
+        await asyncio.to_thread(self._update_item, job_id, index, fields)
+
+    def _update_item(self, job_id: str, index: int, fields: Dict):
+        # Each item is only ever updated by the worker running it
+        item_key = self._item_key(job_id, index)
+        item = self.shared_state.get(item_key)
+        if item is None:
+            return
+        previous = item["status"]
+        item.update(fields)
+        self.shared_state.set(item_key, item, ttl=self.ttl)
+
+        def update(job):
+            # A job that expired meanwhile stays gone
+            return apply_status_change(job, previous, item["status"]) if job else None
+
+        if self.shared_state.update(self._key(job_id), update, ttl=self.ttl) is None:
+            self.shared_state.delete(self._key(job_id))
+            self.shared_state.delete_prefix(self._item_prefix(job_id))
+        else:
+            self.shared_state.expire_prefix(self._item_prefix(job_id), self.ttl)
+
+    async def prune(self, max_age: int):
+        await asyncio.to_thread(self.shared_state.purge_expired)
+
+
+class BatchJobManager:
+    """
+    In-process batch queue.
+    BATCH_WORKERS items run at once; within them, BATCH_YOUTUBE_CONCURRENCY
+    bounds YouTube fetches and BATCH_AI_CONCURRENCY bounds Gemini calls.
+    Job status lives in the shared state when it is cross-process, so
+    every worker process can answer status requests.
+    """
+
+    def __init__(self, summary_service: Optional[SummaryService] = None, store: Optional[JobStore] = None):
+        self.summary_service = summary_service or get_summary_service()
+        self.worker_count = int(os.getenv("BATCH_WORKERS", 4))
+        self.max_items = int(os.getenv("BATCH_MAX_ITEMS", 500))
+        self.job_ttl = int(os.getenv("BATCH_JOB_TTL", 3600))
+        if store is None:
+            shared_state = get_shared_state()
+            store = SharedJobStore(shared_state, self.job_ttl) if shared_state.shared_across_processes else InMemoryJobStore()
+        self.store = store
+        self.youtube_limit = asyncio.Semaphore(int(os.getenv("BATCH_YOUTUBE_CONCURRENCY", 2)))
+        self.ai_limit = asyncio.Semaphore(int(os.getenv("BATCH_AI_CONCURRENCY", 4)))
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"batch-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info(f"Batch queue started with {self.worker_count} workers")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        logger.info("Batch queue stopped")
+
+    async def submit(self, video_urls: List[str], summary_type: str = "detailed") -> Dict:
+        """Create a job for the given URLs and enqueue every item"""
+        if not video_urls:
+            raise ValueError("No videos to summarize")
+        if len(video_urls) > self.max_items:
+            raise ValueError(f"Batch too large: {len(video_urls)} videos (max {self.max_items})")
+
+        self.start()
+        await self.store.prune(self.job_ttl)
+
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "summary_type": summary_type,
+            "total": len(video_urls),
+            "completed": 0,
+            "failed": 0,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+            "items": [
+                {"index": i, "video_url": url, "status": "pending", "result": None, "error": None}
+                for i, url in enumerate(video_urls)
+            ]
+        }
+        await self.store.create(job)
+
+        for i in range(len(video_urls)):
+            self._queue.put_nowait((job["job_id"], i))
+
+        logger.info(f"Batch job {job['job_id']} queued with {len(video_urls)} videos")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.store.get(job_id)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue else 0
+        }
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id, index = await self._queue.get()
+            try:
+                job = await self.store.get(job_id)
+                if not job:
+                    continue
+
+                item = job["items"][index]
+                await self.store.update_item(job_id, index, status="running")
+                try:
+                    # Batch work queues behind interactive requests for Gemini quota
+                    with priority(PRIORITY_BATCH):
+                        result = await self.summary_service.summarize(
+                            item["video_url"],
+                            job["summary_type"],
+                            youtube_limit=self.youtube_limit,
+                            ai_limit=self.ai_limit
+                        )
+                    await self.store.update_item(job_id, index, status="succeeded", result=result)
+                except ResourceWarning as e:
+                    logger.error(f"Batch {job_id} item {index} rate limited: {str(e)}")
+                    await self.store.update_item(job_id, index, status="failed", error="AI Service is currently overloaded. Please try again later.")
+                except Exception as e:
+                    logger.error(f"Batch {job_id} item {index} failed: {str(e)}")
+                    await self.store.update_item(job_id, index, status="failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+
+_batch_manager: Optional[BatchJobManager] = None
+
+
+def get_batch_manager() -> BatchJobManager:
+    """Return the process-wide batch job manager"""
+    global _batch_manager
+    if _batch_manager is None:
+        _batch_manager = BatchJobManager()
+    return _batch_manager
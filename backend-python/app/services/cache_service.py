@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from cachetools import TTLCache
+from app.utils.metrics import CACHE_REQUESTS
+from app.utils.shared_state import get_worker_count
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCacheBackend:
+    """Persistent key/value store for cached summaries backed by a local SQLite file"""
+
+    def __init__(self, path: str, ttl: int):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        # WAL lets several worker processes share the file
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summary_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        logger.info(f"SQLite summary cache opened at {path}")
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM summary_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            value, created_at = row
+            if self.ttl and time.time() - created_at > self.ttl:
+                self._conn.execute("DELETE FROM summary_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict):
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summary_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, payload, time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SummaryCache:
+    """
+    Two-level summary cache: an in-process LRU with TTL in front of an
+    optional persistent backend. Entries are keyed on
+    (video_id, summary_type, model).
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: int = 86400, backend: Optional[SQLiteCacheBackend] = None):
+        self.ttl = ttl
+        self.backend = backend
+        self._memory = TTLCache(maxsize=max_size, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(video_id: str, summary_type: str, model: str) -> str:
+        """Content-addressed key for a summary"""
+        raw = f"{video_id}|{summary_type}|{model}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict]:
+        value = self._memory.get(key)
+        if value is None and self.backend:
+            try:
+                value = await asyncio.to_thread(self.backend.get, key)
+            except Exception as e:
+                logger.warning(f"Persistent cache read failed: {str(e)}")
+                value = None
+            if value is not None:
+                # Promote to the in-process layer
+                self._memory[key] = value
+
+        if value is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache="summary", result="miss")
+            return None
+
+        self.hits += 1
+        CACHE_REQUESTS.inc(cache="summary", result="hit")
+        return dict(value)
+
+    async def peek(self, key: str) -> Optional[Dict]:
+        """Like get, but not counted in hit/miss statistics (used while polling)"""
+        value = self._memory.get(key)
+        if value is None and self.backend:
+            try:
+                value = await asyncio.to_thread(self.backend.get, key)
+            except Exception as e:
+                logger.warning(f"Persistent cache read failed: {str(e)}")
+                return None
+        return dict(value) if value is not None else None
+
+    async def set(self, key: str, value: Dict):
+        self._memory[key] = dict(value)
+        if self.backend:
+            try:
+                await asyncio.to_thread(self.backend.set, key, value)
+            except Exception as e:
+                logger.warning(f"Persistent cache write failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "memory_entries": len(self._memory),
+            "backend": "sqlite" if self.backend else "memory"
+        }
+
+    def close(self):
+        if self.backend:
+            self.backend.close()
+
+
+_summary_cache: Optional[SummaryCache] = None
+
+
+def get_summary_cache() -> SummaryCache:
+    """
+    Return the process-wide summary cache.
+    Configured by SUMMARY_CACHE_SIZE, SUMMARY_CACHE_TTL, SUMMARY_CACHE_BACKEND
+    ("memory" or "sqlite"; defaults to "sqlite" when WEB_CONCURRENCY > 1 so
+    worker processes share entries) and SUMMARY_CACHE_PATH.
+    """
+    global _summary_cache
+    if _summary_cache is None:
+        max_size = int(os.getenv("SUMMARY_CACHE_SIZE", 1024))
+        ttl = int(os.getenv("SUMMARY_CACHE_TTL", 86400))
+        default_backend = "sqlite" if get_worker_count() > 1 else "memory"
+        backend_name = os.getenv("SUMMARY_CACHE_BACKEND", default_backend).lower()
+
+        backend = None
+        if backend_name == "sqlite":
+            path = os.getenv("SUMMARY_CACHE_PATH", "data/summary_cache.db")
+            backend = SQLiteCacheBackend(path, ttl)
+
+        _summary_cache = SummaryCache(max_size=max_size, ttl=ttl, backend=backend)
+        logger.info(f"Summary cache initialized ({backend_name}, size={max_size}, ttl={ttl}s)")
+    return _summary_cache
@@ -0,0 +1,242 @@
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+from app.utils.metrics import ROUTING_DECISIONS
+from app.utils.rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+TIER_LIGHT = "light"
+TIER_STANDARD = "standard"
+TIER_LONG = "long"
+
+# USD per 1M (prompt, response) tokens; override with GEMINI_PRICING
+DEFAULT_PRICING = {
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+}
+
+
+def get_model_name() -> str:
+    """Gemini model name from GEMINI_MODEL, defaulting to gemini-2.5-flash"""
+    return os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+
+class Route:
+    """
+    Models to use for one summary, in order of preference, plus what was
+    spent on each of them. Calls start on models[0] and move down the list
+    on a 429 or timeout.
+    """
+
+    def __init__(self, tier: str, models: List[str], reason: str):
+        self.tier = tier
+        self.models = models
+        self.reason = reason
+        self.usage: Dict[str, Dict] = {}
+        self.failovers: List[Dict] = []
+        # Last 429/timeout seen, raised once every candidate has been tried
+        self.last_error: Optional[Exception] = None
+
+    @property
+    def model(self) -> str:
+        return self.models[0]
+
+    def record_call(self, model: str, seconds: float, prompt_tokens: int, response_tokens: int, cost: Optional[float]):
+        usage = self.usage.setdefault(model, {
+            "calls": 0, "seconds": 0.0, "prompt_tokens": 0, "response_tokens": 0, "cost_usd": 0.0
+        })
+        usage["calls"] += 1
+        usage["seconds"] += seconds
+        usage["prompt_tokens"] += prompt_tokens
+        usage["response_tokens"] += response_tokens
+        if cost is None:
+            usage["cost_usd"] = None
+        elif usage["cost_usd"] is not None:
+            usage["cost_usd"] += cost
+
+    def record_failover(self, from_model: str, to_model: str, reason: str):
+        self.failovers.append({"from": from_model, "to": to_model, "reason": reason})
+
+    def report(self) -> Dict:
+        """Routing summary returned with the response"""
+        models = {}
+        for model, usage in self.usage.items():
+            models[model] = {
+                "calls": usage["calls"],
+                "seconds": round(usage["seconds"], 2),
+                "avg_latency": round(usage["seconds"] / usage["calls"], 3),
+                "prompt_tokens": usage["prompt_tokens"],
+                "response_tokens": usage["response_tokens"],
+                "cost_usd": round(usage["cost_usd"], 6) if usage["cost_usd"] is not None else None
+            }
+        costs = [usage["cost_usd"] for usage in models.values()]
+        return {
+            "tier": self.tier,
+            "model": self.model,
+            "reason": self.reason,
+            "fallbacks": self.models[1:],
+            "failovers": self.failovers,
+            "models": models,
+            "cost_usd": round(sum(costs), 6) if costs and None not in costs else None
+        }
+
+
+class ModelRouter:
+    """
+    Picks the Gemini model for a summary from the (normalized) transcript
+    size, the summary type and how long each model's rate limiter would
+    make the call wait:
+
+    - light: short transcripts, and brief summaries of medium ones
+    - long: transcripts of at least long_min_tokens
+    - standard: everything else (GEMINI_MODEL)
+
+    When the chosen model's queue would wait longer than max_wait, the
+    candidate with the shortest wait is moved to the front. The other
+    configured models follow as failover candidates.
+    """
+
+    def __init__(
+        self,
+        standard_model: str,
+        light_model: str,
+        long_model: str,
+        light_max_tokens: int = 8000,
+        brief_max_tokens: int = 30000,
+        long_min_tokens: int = 100000,
+        max_wait: float = 5.0,
+        failover: bool = True,
+        enabled: bool = True,
+        pricing: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        self.models = {TIER_LIGHT: light_model, TIER_STANDARD: standard_model, TIER_LONG: long_model}
+        self.light_max_tokens = light_max_tokens
+        self.brief_max_tokens = brief_max_tokens
+        self.long_min_tokens = long_min_tokens
+        self.max_wait = max_wait
+        self.failover = failover
+        self.enabled = enabled
+        self.pricing = pricing if pricing is not None else dict(DEFAULT_PRICING)
+
+    def route(self, tokens: int, summary_type: str) -> Route:
+        """Choose the tier and the ordered model candidates for a transcript of ~tokens"""
+        if not self.enabled:
+            tier, reason = TIER_STANDARD, "routing_disabled"
+        elif tokens >= self.long_min_tokens:
+            tier, reason = TIER_LONG, "long_transcript"
+        elif tokens <= self.light_max_tokens:
+            tier, reason = TIER_LIGHT, "short_transcript"
+        elif summary_type == "brief" and tokens <= self.brief_max_tokens:
+            tier, reason = TIER_LIGHT, "brief_summary"
+        else:
+            tier, reason = TIER_STANDARD, "default"
+
+        models = self._candidates(tier) if self.enabled else [self.models[TIER_STANDARD]]
+        if len(models) > 1:
+            waits = {model: get_rate_limiter(model).estimated_wait(tokens) for model in models}
+            if waits[models[0]] > self.max_wait:
+                best = min(models, key=lambda model: waits[model])
+                if waits[best] < waits[models[0]]:
+                    logger.info(
+                        f"{models[0]} quota wait ~{waits[models[0]]:.1f}s, routing to {best} (~{waits[best]:.1f}s)"
+                    )
+                    models.remove(best)
+                    models.insert(0, best)
+                    reason = "quota_headroom"
+
+        if not self.failover:
+            models = models[:1]
+        ROUTING_DECISIONS.inc(tier=tier, model=models[0], reason=reason)
+        return Route(tier, models, reason)
+
+    def _candidates(self, tier: str) -> List[str]:
+        """The tier's model followed by the other tiers' models, nearest capability first"""
+        order = {
+            TIER_LIGHT: [TIER_LIGHT, TIER_STANDARD, TIER_LONG],
+            TIER_STANDARD: [TIER_STANDARD, TIER_LIGHT, TIER_LONG],
+            TIER_LONG: [TIER_LONG, TIER_STANDARD, TIER_LIGHT],
+        }[tier]
+        models = []
+        for name in order:
+            if self.models[name] not in models:
+                models.append(self.models[name])
+        return models
+
+    def cache_tag(self) -> str:
+        """
+        The model set and thresholds a summary may come from, for cache keys.
+        Just the standard model when every tier uses it (or routing is off).
+        """
+        standard = self.models[TIER_STANDARD]
+        if not self.enabled or set(self.models.values()) == {standard}:
+            return standard
+        return (
+            f"{self.models[TIER_LIGHT]}<={self.light_max_tokens}/{self.brief_max_tokens}"
+            f",{standard},{self.models[TIER_LONG]}>={self.long_min_tokens}"
+        )
+
+    def cost(self, model: str, prompt_tokens: int, response_tokens: int) -> Optional[float]:
+        """Estimated USD for one call, or None when the model has no known price"""
+        price = self.pricing.get(model)
+        if price is None:
+            return None
+        return (prompt_tokens * price[0] + response_tokens * price[1]) / 1000000
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "models": dict(self.models),
+            "light_max_tokens": self.light_max_tokens,
+            "brief_max_tokens": self.brief_max_tokens,
+            "long_min_tokens": self.long_min_tokens,
+            "max_wait": self.max_wait,
+            "failover": self.failover
+        }
+
+
+def _pricing() -> Dict[str, Tuple[float, float]]:
+    """
+    DEFAULT_PRICING overridden by GEMINI_PRICING, e.g.
+    "gemini-2.5-flash=0.30/2.50,gemini-2.5-pro=1.25/10" (USD per 1M prompt/response tokens)
+    """
+    pricing = dict(DEFAULT_PRICING)
+    for entry in os.getenv("GEMINI_PRICING", "").split(","):
+        name, _, prices = entry.strip().partition("=")
+        if name and prices:
+            prompt_price, _, response_price = prices.partition("/")
+            pricing[name] = (float(prompt_price), float(response_price or prompt_price))
+    return pricing
+
+
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """
+    Return the process-wide model router.
+    Configured by GEMINI_LIGHT_MODEL, GEMINI_LONG_MODEL, ROUTER_ENABLED,
+    ROUTER_LIGHT_MAX_TOKENS, ROUTER_BRIEF_MAX_TOKENS, ROUTER_LONG_MIN_TOKENS,
+    ROUTER_MAX_WAIT, ROUTER_FAILOVER and GEMINI_PRICING.
+    """
+    global _model_router
+    if _model_router is None:
+        standard_model = get_model_name()
+        _model_router = ModelRouter(
+            standard_model=standard_model,
+            # Tiering is opt-in: light and long default to GEMINI_MODEL
+            light_model=os.getenv("GEMINI_LIGHT_MODEL", standard_model),
+            long_model=os.getenv("GEMINI_LONG_MODEL", standard_model),
+            light_max_tokens=int(os.getenv("ROUTER_LIGHT_MAX_TOKENS", 8000)),
+            brief_max_tokens=int(os.getenv("ROUTER_BRIEF_MAX_TOKENS", 30000)),
+            long_min_tokens=int(os.getenv("ROUTER_LONG_MIN_TOKENS", 100000)),
+            max_wait=float(os.getenv("ROUTER_MAX_WAIT", 5.0)),
+            failover=os.getenv("ROUTER_FAILOVER", "True").lower() == "true",
+            enabled=os.getenv("ROUTER_ENABLED", "True").lower() == "true",
+            pricing=_pricing()
+        )
+        logger.info(f"Model router initialized ({_model_router.models})")
+    return _model_router
@@ -0,0 +1,332 @@
+import asyncio
+import contextlib
+import os
+import time
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+from app.services.youtube_service import YouTubeService, get_youtube_service
+from app.services.ai_service import DERIVABLE_TYPES, MULTI_FORMAT_TYPES, get_ai_service
+from app.services.model_router import get_model_router
+from app.services.cache_service import SummaryCache, get_summary_cache
+from app.services.transcript_store import get_transcript_store
+from app.utils.single_flight import SingleFlight
+from app.utils.shared_state import SharedState, get_shared_state
+from app.utils.metrics import COALESCED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+class SummaryService:
+    """
+    Runs the fetch -> summarize pipeline behind the summary cache.
+    Concurrent misses for the same video and summary type share one run,
+    across worker processes too when the shared state is cross-process.
+    """
+
+    def __init__(self, youtube_service: YouTubeService = None, cache: SummaryCache = None, shared_state: SharedState = None):
+        self.youtube_service = youtube_service or get_youtube_service()
+        self.cache = cache or get_summary_cache()
+        self.single_flight = SingleFlight(
+            "summary",
+            shared_state=shared_state or get_shared_state(),
+            lock_ttl=float(os.getenv("SUMMARY_LOCK_TTL", 120)),
+            poll_interval=float(os.getenv("SUMMARY_LOCK_POLL", 0.5))
+        )
+        # brief / bullet_points from a cached detailed summary instead of the transcript
+        self.derive_formats = os.getenv("SUMMARY_DERIVE_FORMATS", "True").lower() == "true"
+        # Several uncached formats in one request come from one structured call
+        self.multi_format = os.getenv("SUMMARY_MULTI_FORMAT", "True").lower() == "true"
+
+    async def summarize(
+        self,
+        video_url: str,
+        summary_type: str = "detailed",
+        youtube_limit: Optional[asyncio.Semaphore] = None,
+        ai_limit: Optional[asyncio.Semaphore] = None
+    ) -> Dict:
+        """
+        Return the summary for a video, serving it from cache when possible.
+        The result carries "cached" and, for cache hits, the lookup time as
+        "processing_time", and "coalesced" when it joined another caller's run.
+        youtube_limit / ai_limit optionally bound the fetch and model stages
+        (used by batch jobs).
+        """
+        start_time = time.time()
+
+        video_id = YouTubeService.extract_video_id(video_url)
+        if not video_id:
+            raise ValueError("Invalid YouTube URL")
+
+        cache_key = self._cache_key(video_id, summary_type)
+        cached = await self.cache.get(cache_key)
+        if cached:
+            logger.info(f"Summary cache hit for {video_id} ({summary_type})")
+            cached["cached"] = True
+            cached["coalesced"] = False
+            cached["processing_time"] = round(time.time() - start_time, 4)
+            return cached
+
+        result, shared = await self.single_flight.do(
+            cache_key,
+            lambda: self._generate_and_store(cache_key, video_url, summary_type, youtube_limit, ai_limit),
+            lookup=lambda: self.cache.peek(cache_key)
+        )
+
+        if shared:
+            COALESCED_REQUESTS.inc()
+
+        # Waiters share the leader's dict, so hand each caller its own copy
+        result = dict(result)
+        result["cached"] = False
+        result["coalesced"] = shared
+        return result
+
+    async def summarize_many(self, video_url: str, summary_types: List[str]) -> Dict[str, Dict]:
+        """
+        Return {summary_type: result} for several summary types of one video.
+        Cached types are served from cache; when two or more of
+        MULTI_FORMAT_TYPES are missing (and no detailed summary is cached to
+        derive from) they come from one structured model call over the
+        transcript, and the rest go through summarize one by one.
+        """
+        start_time = time.time()
+
+        video_id = YouTubeService.extract_video_id(video_url)
+        if not video_id:
+            raise ValueError("Invalid YouTube URL")
+
+        summary_types = list(dict.fromkeys(summary_types))
+        results = {}
+        for summary_type in summary_types:
+            cached = await self.cache.get(self._cache_key(video_id, summary_type))
+            if cached:
+                cached["cached"] = True
+                cached["coalesced"] = False
+                cached["processing_time"] = round(time.time() - start_time, 4)
+                results[summary_type] = cached
+
+        together = [t for t in summary_types if t not in results and t in MULTI_FORMAT_TYPES]
+        detailed_cached = "detailed" in results or await self.cache.peek(self._cache_key(video_id, "detailed"))
+        if self.multi_format and len(together) > 1 and not (detailed_cached and self.derive_formats):
+            logger.info(f"Generating {together} for {video_id} in one call")
+            keys = {summary_type: self._cache_key(video_id, summary_type) for summary_type in together}
+            generated, shared = await self.single_flight.do(
+                self._cache_key(video_id, "+".join(together)),
+                lambda: self._generate_many_and_store(keys, video_url, together),
+                lookup=lambda: self._peek_all(keys)
+            )
+            if shared:
+                COALESCED_REQUESTS.inc()
+            for summary_type, result in generated.items():
+                result = dict(result)
+                result["cached"] = False
+                result["coalesced"] = shared
+                results[summary_type] = result
+
+        remaining = [t for t in summary_types if t not in results]
+        for summary_type, result in zip(remaining, await asyncio.gather(*(self.summarize(video_url, t) for t in remaining))):
+            results[summary_type] = result
+
+        return {summary_type: results[summary_type] for summary_type in summary_types}
+
+    async def stream(self, video_url: str, summary_type: str = "detailed") -> AsyncIterator[Dict]:
+        """
+        Run the pipeline yielding progress events as {"event", "data"} dicts:
+        video_id, metadata, transcript, token (repeated), then summary with
+        the same payload the JSON endpoint returns. Cache hits skip straight
+        to metadata and summary; completed streams populate the cache.
+        """
+        start_time = time.time()
+
+        video_id = YouTubeService.extract_video_id(video_url)
+        if not video_id:
+            raise ValueError("Invalid YouTube URL")
+        yield {"event": "video_id", "data": {"video_id": video_id}}
+
+        cache_key = self._cache_key(video_id, summary_type)
+        cached = await self.cache.get(cache_key)
+        if cached:
+            logger.info(f"Summary cache hit for {video_id} ({summary_type})")
+            yield {"event": "metadata", "data": self._metadata(cached)}
+            cached["cached"] = True
+            cached["coalesced"] = False
+            cached["processing_time"] = round(time.time() - start_time, 4)
+            yield {"event": "summary", "data": cached}
+            return
+
+        derived = await self._derive(video_id, summary_type)
+        if derived:
+            yield {"event": "metadata", "data": self._metadata(derived)}
+            await self.cache.set(cache_key, derived)
+            derived["cached"] = False
+            derived["coalesced"] = False
+            yield {"event": "summary", "data": derived}
+            return
+
+        video_data = await self.youtube_service.get_video_data(video_url)
+        yield {"event": "metadata", "data": self._metadata(video_data)}
+        transcript = video_data["transcript"]
+        yield {"event": "transcript", "data": {
+            "transcript_length": transcript.char_count,
+            "segment_count": len(transcript),
+            "chapters": transcript.chapters
+        }}
+
+        ai_service = get_ai_service()
+        summary = None
+        async for event in ai_service.stream_summary(
+            transcript=transcript,
+            summary_type=summary_type,
+            video_title=video_data["title"]
+        ):
+            if event["event"] == "summary_complete":
+                summary = event["data"]
+            else:
+                yield event
+
+        result = self._build_result(video_data, summary, summary_type)
+        await self.cache.set(cache_key, result)
+
+        result["cached"] = False
+        result["coalesced"] = False
+        yield {"event": "summary", "data": result}
+
+    def stats(self) -> Dict:
+        return {
+            "cache": self.cache.stats(),
+            "single_flight": self.single_flight.stats(),
+            "transcript_store": get_transcript_store().stats()
+        }
+
+    async def _generate_and_store(self, cache_key: str, video_url: str, summary_type: str, youtube_limit=None, ai_limit=None) -> Dict:
+        result = await self._derive(YouTubeService.extract_video_id(video_url), summary_type, ai_limit)
+        if result is None:
+            result = await self._generate(video_url, summary_type, youtube_limit, ai_limit)
+        await self.cache.set(cache_key, result)
+        return result
+
+    async def _generate_many_and_store(self, keys: Dict[str, str], video_url: str, summary_types: List[str]) -> Dict[str, Dict]:
+        video_data = await self.youtube_service.get_video_data(video_url)
+        if not video_data:
+            raise ValueError("Could not fetch video data")
+
+        summaries = await get_ai_service().generate_summaries(
+            transcript=video_data["transcript"],
+            summary_types=summary_types,
+            video_title=video_data["title"]
+        )
+
+        results = {}
+        for summary_type in summary_types:
+            summary = dict(summaries, text=summaries["texts"][summary_type])
+            result = self._build_result(video_data, summary, summary_type)
+            result["generated_with"] = summary_types
+            await self.cache.set(keys[summary_type], result)
+            results[summary_type] = result
+        return results
+
+    async def _peek_all(self, keys: Dict[str, str]) -> Optional[Dict[str, Dict]]:
+        """Every cached result for keys, or None while any is missing"""
+        results = {}
+        for summary_type, key in keys.items():
+            result = await self.cache.peek(key)
+            if result is None:
+                return None
+            results[summary_type] = result
+        return results
+
+    async def _derive(self, video_id: str, summary_type: str, ai_limit=None) -> Optional[Dict]:
+        """
+        Build a brief / bullet_points summary from the cached detailed one
+        with a small prompt; None when that is disabled or nothing is cached
+        """
+        if not self.derive_formats or summary_type not in DERIVABLE_TYPES:
+            return None
+        detailed = await self.cache.peek(self._cache_key(video_id, "detailed"))
+        if not detailed:
+            return None
+
+        async with ai_limit or contextlib.nullcontext():
+            summary = await get_ai_service().derive_summary(detailed["summary"], summary_type, detailed["title"])
+
+        result = {
+            key: value for key, value in detailed.items()
+            if key not in ("cached", "coalesced", "generated_with")
+        }
+        result.update({
+            "summary": summary["text"],
+            "processing_time": summary["processing_time"],
+            "summary_type": summary_type,
+            "chunk_count": summary["chunk_count"],
+            "stage_timings": summary["stage_timings"],
+            "routing": summary["routing"],
+            "derived_from": "detailed"
+        })
+        logger.info(f"Derived {summary_type} summary for {video_id} from the cached detailed one")
+        return result
+
+    @staticmethod
+    def _cache_key(video_id: str, summary_type: str) -> str:
+        return SummaryCache.make_key(video_id, summary_type, get_model_router().cache_tag())
+
+    async def _generate(self, video_url: str, summary_type: str, youtube_limit=None, ai_limit=None) -> Dict:
+        # Fetch video data and transcript
+        async with youtube_limit or contextlib.nullcontext():
+            video_data = await self.youtube_service.get_video_data(video_url)
+        
+        if not video_data:
+            raise ValueError("Could not fetch video data")
+        
+        logger.info(f"Video data fetched: {video_data['title']}")
+        
+        # Generate AI summary
+        ai_service = get_ai_service()
+        async with ai_limit or contextlib.nullcontext():
+            summary = await ai_service.generate_summary(
+                transcript=video_data["transcript"],
+                summary_type=summary_type,
+                video_title=video_data["title"]
+            )
+        
+        logger.info(f"Summary generated successfully")
+
+        return self._build_result(video_data, summary, summary_type)
+
+    @staticmethod
+    def _metadata(video_data: Dict) -> Dict:
+        return {
+            "video_id": video_data["video_id"],
+            "title": video_data["title"],
+            "duration": video_data["duration"],
+            "thumbnail": video_data["thumbnail"]
+        }
+
+    @staticmethod
+    def _build_result(video_data: Dict, summary: Dict, summary_type: str) -> Dict:
+        return {
+            "video_id": video_data["video_id"],
+            "title": video_data["title"],
+            "duration": video_data["duration"],
+            "thumbnail": video_data["thumbnail"],
+            "summary": summary["text"],
+            "transcript_length": video_data["transcript"].char_count,
+            "processing_time": summary["processing_time"],
+            "summary_type": summary_type,
+            "chunk_count": summary["chunk_count"],
+            "stage_timings": summary["stage_timings"],
+            "transcript_source": video_data["transcript_source"],
+            "fetch_timings": video_data["timings"],
+            "chapters": video_data["transcript"].chapters,
+            "token_estimate": summary.get("token_estimate"),
+            "routing": summary.get("routing")
+        }
+
+
+_summary_service: Optional[SummaryService] = None
+
+
+def get_summary_service() -> SummaryService:
+    """Return the process-wide SummaryService (shared cache and in-flight table)"""
+    global _summary_service
+    if _summary_service is None:
+        _summary_service = SummaryService()
+    return _summary_service
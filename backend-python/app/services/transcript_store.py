@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import zlib
+from typing import Dict, List, Optional
+from app.utils.metrics import CACHE_REQUESTS
+from app.utils.transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class TranscriptStore:
+    """
+    On-disk store for fetched transcripts, keyed by (video_id, language).
+
+    Each entry holds the timed segments plus title, duration, thumbnail and
+    chapters (and whether that metadata came from yt-dlp or is a
+    placeholder to refetch), serialized as compact JSON (segments as [start, duration, text]
+    rows) and zlib-compressed, one file per key.
+    """
+
+    def __init__(self, directory: str, ttl: int = 0, compression_level: int = 6):
+        self.directory = directory
+        self.ttl = ttl
+        self.compression_level = compression_level
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, video_id: str, language: str) -> str:
+        safe_id = re.sub(r'[^A-Za-z0-9_-]', '_', video_id)
+        safe_lang = re.sub(r'[^A-Za-z0-9_-]', '_', language)
+        return os.path.join(self.directory, f"{safe_id}.{safe_lang}.json.z")
+
+    def get(self, video_id: str, languages: List[str]) -> Optional[Dict]:
+        """Return the first stored transcript matching the language preference order"""
+        for language in languages:
+            path = self._path(video_id, language)
+            if not os.path.exists(path):
+                continue
+
+            if self.ttl and time.time() - os.path.getmtime(path) > self.ttl:
+                self._remove(path)
+                continue
+
+            try:
+                with open(path, "rb") as f:
+                    record = json.loads(zlib.decompress(f.read()))
+            except Exception as e:
+                logger.warning(f"Discarding unreadable transcript store entry {path}: {str(e)}")
+                self._remove(path)
+                continue
+
+            if record.get("v") != FORMAT_VERSION:
+                continue
+
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="transcript", result="hit")
+            return {
+                "video_id": record["video_id"],
+                "language": record["language"],
+                "title": record["title"],
+                "duration": record["duration"],
+                "thumbnail": record["thumbnail"],
+                # Entries written before the flag existed: a zero duration means yt-dlp failed
+                "metadata_complete": record.get("metadata_complete", bool(record["duration"])),
+                "transcript": Transcript.from_rows(
+                    record["segments"], language=record["language"], chapters=record.get("chapters")
+                )
+            }
+
+        self.misses += 1
+        CACHE_REQUESTS.inc(cache="transcript", result="miss")
+        return None
+
+    def put(
+        self,
+        video_id: str,
+        title: str,
+        duration: int,
+        thumbnail: str,
+        transcript: Transcript,
+        metadata_complete: bool = True
+    ):
+        """
+        Persist a transcript; written to a temp file first so readers never
+        see partial data. metadata_complete=False marks placeholder metadata.
+        """
+        language = transcript.language or "en"
+        record = {
+            "v": FORMAT_VERSION,
+            "video_id": video_id,
+            "language": language,
+            "title": title,
+            "duration": duration,
+            "thumbnail": thumbnail,
+            "metadata_complete": metadata_complete,
+            "chapters": transcript.chapters,
+            "segments": transcript.rows()
+        }
+        payload = zlib.compress(
+            json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+            self.compression_level
+        )
+
+        path = self._path(video_id, language)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        logger.info(f"Stored transcript for {video_id} ({language}, {len(payload)} bytes)")
+
+    async def get_async(self, video_id: str, languages: List[str]) -> Optional[Dict]:
+        try:
+            return await asyncio.to_thread(self.get, video_id, languages)
+        except Exception as e:
+            logger.warning(f"Transcript store read failed: {str(e)}")
+            return None
+
+    async def put_async(self, *args, **kwargs):
+        try:
+            await asyncio.to_thread(self.put, *args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Transcript store write failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+_transcript_store: Optional[TranscriptStore] = None
+
+
+def get_transcript_store() -> TranscriptStore:
+    """
+    Return the process-wide transcript store.
+    Configured by TRANSCRIPT_STORE_DIR and TRANSCRIPT_STORE_TTL (seconds, 0 = keep forever).
+    """
+    global _transcript_store
+    if _transcript_store is None:
+        directory = os.getenv("TRANSCRIPT_STORE_DIR", "data/transcripts")
+        ttl = int(os.getenv("TRANSCRIPT_STORE_TTL", 30 * 86400))
+        _transcript_store = TranscriptStore(directory, ttl=ttl)
+        logger.info(f"Transcript store initialized at {directory}")
+    return _transcript_store
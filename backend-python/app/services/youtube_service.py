@@ -1,13 +1,47 @@
+import asyncio
 import re
+import threading
+import time
 import yt_dlp
 import logging
 import os
-import tempfile
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from app.utils.concurrency import run_blocking
+from app.utils.cookies import CookieFile
+from app.utils.http_client import create_session
+from app.utils.metrics import TRANSCRIPT_FAILURES, TRANSCRIPT_SOURCE
+from app.utils.tracing import span
+from app.utils.transcript import Transcript, normalize_chapters
+from app.services.transcript_store import TranscriptStore, get_transcript_store
 
 logger = logging.getLogger(__name__)
 
+TRANSCRIPT_LANGUAGES = ['en', 'en-US', 'en-GB']
+
 class YouTubeService:
+    """
+    Long-lived YouTube client: holds the pooled HTTP session, the cookie
+    file and one reusable yt-dlp instance per worker thread.
+    """
+
+    def __init__(self, transcript_store: Optional[TranscriptStore] = None):
+        self.transcript_store = transcript_store or get_transcript_store()
+        self.http = create_session(pool_size=int(os.getenv("YOUTUBE_WORKERS", 8)))
+        self.cookies = CookieFile("YOUTUBE_COOKIES")
+        # YoutubeDL is not thread-safe, so each worker thread keeps its own
+        self._local = threading.local()
+
+        # Per-phase timeouts (seconds) and the optional hedge threshold (0 = off)
+        self.transcript_timeout = float(os.getenv("YOUTUBE_TRANSCRIPT_TIMEOUT", 20))
+        self.metadata_timeout = float(os.getenv("YOUTUBE_METADATA_TIMEOUT", 20))
+        self.subtitle_timeout = float(os.getenv("YOUTUBE_SUBTITLE_TIMEOUT", 15))
+        self.hedge_after = float(os.getenv("YOUTUBE_HEDGE_AFTER", 0))
+
+    def close(self):
+        """Release pooled connections and the cookie file (application shutdown)"""
+        self.http.close()
+        self.cookies.remove()
+
     @staticmethod
     def extract_video_id(url: str) -> Optional[str]:
         """Extract video ID from various YouTube URL formats"""
@@ -22,129 +56,140 @@ class YouTubeService:
                 return match.group(1)
         return None
     
-    def _get_cookies_file(self) -> Optional[str]:
+    @staticmethod
+    def extract_playlist_id(url: str) -> Optional[str]:
+        """Extract playlist ID from a YouTube playlist or watch URL"""
+        match = re.search(r'[?&]list=([^&\n?#]+)', url)
+        return match.group(1) if match else None
+
+    async def expand_playlist(self, playlist_url: str, max_items: int) -> List[str]:
         """
-        Create a temporary file containing YouTube cookies from environment variable.
-        Returns the path to the temporary file or None if env var is missing.
-        Caller is responsible for removing the file.
+        Resolve a playlist URL into individual watch URLs (flat extraction,
+        no per-video requests).
         """
-        cookies_content = os.getenv("YOUTUBE_COOKIES")
-        if not cookies_content:
-            return None
-            
+        playlist_id = self.extract_playlist_id(playlist_url)
+        if not playlist_id:
+            raise ValueError("Invalid YouTube playlist URL")
+
         try:
-            # Create a named temp file that isn't deleted on close (so other libs can read it)
-            # We must delete it manually later
-            fd, path = tempfile.mkstemp(suffix=".txt", text=True)
-            with os.fdopen(fd, 'w') as f:
-                f.write(cookies_content)
-            return path
+            return await run_blocking(self._fetch_playlist_entries, playlist_id, self.cookies.path(), max_items)
+        except ValueError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to create cookies file: {str(e)}")
-            return None
+            logger.error(f"Error expanding playlist: {str(e)}")
+            raise ValueError(f"Failed to fetch playlist: {str(e)}")
+
+    def _fetch_playlist_entries(self, playlist_id: str, cookie_file: Optional[str], max_items: int) -> List[str]:
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'extract_flat': 'in_playlist',
+            'playlistend': max_items,
+        }
+        if cookie_file:
+            ydl_opts['cookiefile'] = cookie_file
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(f"https://www.youtube.com/playlist?list={playlist_id}", download=False)
+
+        video_urls = [
+            f"https://www.youtube.com/watch?v={entry['id']}"
+            for entry in info.get('entries') or []
+            if entry and entry.get('id')
+        ]
+        logger.info(f"Playlist {playlist_id} expanded to {len(video_urls)} videos")
+        return video_urls
+
+    def _get_ydl(self, cookie_file: Optional[str]) -> yt_dlp.YoutubeDL:
+        """
+        Return this worker thread's YoutubeDL instance, rebuilding it only
+        when the cookie file changes.
+        """
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is not None and self._local.cookie_file == cookie_file:
+            return ydl
+
+        if ydl is not None:
+            ydl.close()
+
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'skip_download': True,
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+            'subtitleslangs': ['en'],
+            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'nocheckcertificate': True,
+            'geo_bypass': True,
+        }
+        
+        # Add cookiefile if available
+        if cookie_file:
+            ydl_opts['cookiefile'] = cookie_file
+
+        ydl = yt_dlp.YoutubeDL(ydl_opts)
+        self._local.ydl = ydl
+        self._local.cookie_file = cookie_file
+        return ydl
 
     async def get_video_data(self, video_url: str) -> Dict:
         """
-        Fetch video metadata and transcript with multiple fallback mechanisms
+        Fetch video metadata and transcript with multiple fallback mechanisms.
+        Blocking library calls run on the shared YouTube worker pool.
         """
-        cookie_file = None
         try:
             video_id = self.extract_video_id(video_url)
             if not video_id:
                 raise ValueError("Invalid YouTube URL")
             
             logger.info(f"Processing video ID: {video_id}")
-            
+
+            fetch_start = time.time()
+            timings = {}
+
+            # PHASE 0: Reuse a previously fetched transcript if we have one
+            with span("youtube.store_lookup", video_id=video_id):
+                stored = await self.transcript_store.get_async(video_id, TRANSCRIPT_LANGUAGES)
+            timings["store"] = round(time.time() - fetch_start, 3)
+            if stored:
+                logger.info(f"Transcript store hit for {video_id} ({stored['language']})")
+                TRANSCRIPT_SOURCE.inc(source="store")
+                if not stored["metadata_complete"]:
+                    stored = await self._refresh_stored_metadata(video_id, stored, timings)
+                timings["total"] = round(time.time() - fetch_start, 3)
+                return self._build_video_data(
+                    video_id, stored["title"], stored["duration"], stored["thumbnail"], stored["transcript"],
+                    "store", timings
+                )
+
             # Setup Cookies
-            cookie_file = self._get_cookies_file()
+            cookie_file = self.cookies.path()
             if cookie_file:
                 logger.info(f"Using provided YouTube cookies")
 
-            transcript = None
             error_details = []
 
-            # PHASE 1: Try YouTubeTranscriptApi (More reliable for transcripts)
-            try:
-                from youtube_transcript_api import YouTubeTranscriptApi
-                logger.info(f"Attempting transcript extraction with YouTubeTranscriptApi for: {video_id}")
-                
-                try:
-                    # Get list of available transcripts
-                    # Pass cookies if available
-                    transcript_list = YouTubeTranscriptApi.list_transcripts(video_id, cookies=cookie_file)
-                    
-                    # Try to find best English transcript
-                    try:
-                        # 1. Manual English
-                        t = transcript_list.find_manually_created_transcript(['en', 'en-US', 'en-GB'])
-                        logger.info(f"Found manual English transcript: {t.language_code}")
-                    except:
-                        try:
-                            # 2. Generated English
-                            t = transcript_list.find_generated_transcript(['en', 'en-US', 'en-GB'])
-                            logger.info(f"Found generated English transcript: {t.language_code}")
-                        except:
-                            # 3. Any English (might be translated)
-                            t = transcript_list.find_transcript(['en', 'en-US', 'en-GB'])
-                            logger.info(f"Found some English transcript: {t.language_code}")
-                    
-                    transcript_data = t.fetch()
-                    transcript = ' '.join([entry['text'] for entry in transcript_data])
-                    logger.info("Transcript fetched successfully via YouTubeTranscriptApi")
-                except Exception as e:
-                    logger.warning(f"YouTubeTranscriptApi (list_transcripts) failed: {str(e)}")
-                    # Fallback to direct get_transcript (also pass cookies)
-                    transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=['en', 'en-US', 'en-GB'], cookies=cookie_file)
-                    transcript = ' '.join([entry['text'] for entry in transcript_data])
-                    logger.info("Transcript fetched successfully via direct get_transcript")
-            except Exception as e:
-                error_details.append(f"YouTubeTranscriptApi failed: {str(e)}")
-                logger.warning(f"YouTubeTranscriptApi failed: {str(e)}")
+            # PHASE 1 & 2 run concurrently: YouTubeTranscriptApi for the transcript,
+            # yt-dlp for metadata (and the subtitle tracks used as fallback)
+            transcript_task = asyncio.ensure_future(self._run_phase(
+                "transcript_api", self.transcript_timeout, timings, error_details,
+                self._fetch_transcript, video_id, cookie_file, error_details
+            ))
+            metadata_task = asyncio.ensure_future(self._run_phase(
+                "metadata", self.metadata_timeout, timings, error_details,
+                self._fetch_metadata, video_id, cookie_file, error_details
+            ))
 
-            # PHASE 2: Fetch Metadata (Title, Thumbnail, Duration)
-            title = "YouTube Video"
-            duration = 0
-            thumbnail = f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
-            
-            # PHASE 3: Try yt-dlp for METADATA and TRANSCRIPT FALLBACK
-            try:
-                ydl_opts = {
-                    'quiet': True,
-                    'no_warnings': True,
-                    'skip_download': True,
-                    'writesubtitles': not transcript,
-                    'writeautomaticsub': not transcript,
-                    'subtitleslangs': ['en'],
-                    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'nocheckcertificate': True,
-                    'geo_bypass': True,
-                }
-                
-                # Add cookiefile if available
-                if cookie_file:
-                    ydl_opts['cookiefile'] = cookie_file
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
-                    title = info.get('title', title)
-                    duration = info.get('duration', duration)
-                    thumbnail = info.get('thumbnail', thumbnail)
-                    
-                    # If transcript still missing, try to extract from yt-dlp info
-                    if not transcript:
-                        subtitles = info.get('subtitles', {})
-                        automatic_captions = info.get('automatic_captions', {})
-                        
-                        target_subs = subtitles.get('en') or automatic_captions.get('en')
-                        if target_subs:
-                            logger.info("Attempting transcript extraction from yt-dlp subtitle tracks")
-                            transcript = self._extract_text_from_subtitles(target_subs)
-            except Exception as e:
-                error_details.append(f"yt-dlp metadata fetch failed: {str(e)}")
-                logger.warning(f"yt-dlp failed: {str(e)}")
+            # PHASE 3: yt-dlp subtitle fallback (or hedge)
+            transcript = await self._resolve_transcript(transcript_task, metadata_task, timings, error_details)
+            metadata = await metadata_task or self._default_metadata(video_id)
+            timings["total"] = round(time.time() - fetch_start, 3)
 
             # FINAL CHECK
             if not transcript:
+                TRANSCRIPT_FAILURES.inc()
                 detailed_error = " | ".join(error_details)
                 logger.error(f"No transcript found for {video_id}. Errors: {detailed_error}")
                 
@@ -153,54 +198,264 @@ class YouTubeService:
                 
                 raise ValueError("Could not fetch transcript for this video. It may have captions disabled or be age-restricted.")
             
-            return {
-                "video_id": video_id,
-                "title": title,
-                "duration": duration,
-                "thumbnail": thumbnail,
-                "transcript": transcript
-            }
+            logger.info(f"Video data for {video_id} fetched via {transcript['source']} in {timings['total']:.2f}s")
+            TRANSCRIPT_SOURCE.inc(source=transcript["source"])
+            transcript["transcript"].chapters = metadata.get("chapters") or []
+
+            # Placeholder metadata (yt-dlp failed or timed out) is marked so a later hit refetches it
+            await self.transcript_store.put_async(
+                video_id, metadata["title"], metadata["duration"], metadata["thumbnail"], transcript["transcript"],
+                metadata_complete=metadata.get("complete", False)
+            )
+
+            return self._build_video_data(
+                video_id, metadata["title"], metadata["duration"], metadata["thumbnail"], transcript["transcript"],
+                transcript["source"], timings
+            )
             
         except ValueError:
             raise
         except Exception as e:
             logger.error(f"Error fetching video data: {str(e)}")
             raise ValueError(f"Failed to fetch video data: {str(e)}")
+
+    async def _refresh_stored_metadata(self, video_id: str, stored: Dict, timings: Dict) -> Dict:
+        """
+        Refetch yt-dlp metadata for a stored transcript saved with
+        placeholder metadata; the entry is rewritten once it succeeds
+        """
+        error_details = []
+        metadata = await self._run_phase(
+            "metadata", self.metadata_timeout, timings, error_details,
+            self._fetch_metadata, video_id, self.cookies.path(), error_details
+        )
+        if not metadata or not metadata.get("complete"):
+            logger.warning(f"Metadata for stored transcript {video_id} still unavailable")
+            return stored
+
+        transcript = stored["transcript"]
+        transcript.chapters = metadata.get("chapters") or []
+        await self.transcript_store.put_async(
+            video_id, metadata["title"], metadata["duration"], metadata["thumbnail"], transcript
+        )
+        logger.info(f"Refreshed metadata for stored transcript {video_id}")
+        return dict(
+            stored,
+            title=metadata["title"],
+            duration=metadata["duration"],
+            thumbnail=metadata["thumbnail"],
+            metadata_complete=True
+        )
+
+    async def _resolve_transcript(self, transcript_task, metadata_task, timings: Dict, error_details: List[str]) -> Optional[Dict]:
+        """
+        Wait for the primary transcript path, falling back to the yt-dlp
+        subtitle tracks if it fails. In hedged mode (YOUTUBE_HEDGE_AFTER > 0)
+        the subtitle path also starts once the primary path is slower than
+        the threshold, and whichever returns a transcript first wins.
+        """
+        if self.hedge_after > 0:
+            done, _ = await asyncio.wait({transcript_task}, timeout=self.hedge_after)
+            if not done:
+                logger.info(f"Transcript API slower than {self.hedge_after}s, hedging with yt-dlp subtitles")
+                timings["hedge_started"] = self.hedge_after
+                hedge_task = asyncio.ensure_future(self._subtitle_path(metadata_task, timings, error_details))
+                pending = {transcript_task, hedge_task}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        transcript = task.result()
+                        if transcript:
+                            # The losing worker thread cannot be interrupted; its result is discarded
+                            for other in pending:
+                                other.cancel()
+                            return transcript
+                return None
+
+        transcript = await transcript_task
+        if transcript:
+            return transcript
+        return await self._subtitle_path(metadata_task, timings, error_details)
+
+    async def _subtitle_path(self, metadata_task, timings: Dict, error_details: List[str]) -> Optional[Dict]:
+        """Download the json3 subtitle track advertised by yt-dlp metadata"""
+        # Shielded so a cancelled hedge never cancels the shared metadata fetch
+        metadata = await asyncio.shield(metadata_task)
+        target_subs = metadata.get("subtitle_tracks") if metadata else None
+        if not target_subs:
+            return None
+
+        logger.info("Attempting transcript extraction from yt-dlp subtitle tracks")
+        transcript = await self._run_phase(
+            "subtitles", self.subtitle_timeout, timings, error_details,
+            self._extract_segments_from_subtitles, target_subs
+        )
+        if not transcript:
+            return None
+        return {"transcript": transcript, "source": "yt_dlp_subtitles"}
+
+    async def _run_phase(self, name: str, timeout: float, timings: Dict, error_details: List[str], func, *args):
+        """Run one blocking fetch phase on the worker pool with its own timeout, recording its duration"""
+        start = time.time()
+        try:
+            with span(f"youtube.{name}"):
+                return await asyncio.wait_for(run_blocking(func, *args), timeout=timeout)
+        except asyncio.TimeoutError:
+            error_details.append(f"{name} timed out after {timeout}s")
+            logger.warning(f"{name} timed out after {timeout}s")
+            return None
         finally:
-            # Clean up cookie file
-            if cookie_file and os.path.exists(cookie_file):
+            timings[name] = round(time.time() - start, 3)
+
+    @staticmethod
+    def _default_metadata(video_id: str) -> Dict:
+        return {
+            "title": "YouTube Video",
+            "duration": 0,
+            "thumbnail": f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
+            "subtitle_tracks": None,
+            "chapters": [],
+            # True once yt-dlp has filled these in
+            "complete": False
+        }
+
+    @staticmethod
+    def _build_video_data(
+        video_id: str,
+        title: str,
+        duration: int,
+        thumbnail: str,
+        transcript: Transcript,
+        source: str,
+        timings: Dict
+    ) -> Dict:
+        return {
+            "video_id": video_id,
+            "title": title,
+            "duration": duration,
+            "thumbnail": thumbnail,
+            "transcript": transcript,
+            "transcript_source": source,
+            "timings": timings
+        }
+
+    def _fetch_transcript(self, video_id: str, cookie_file: Optional[str], error_details: List[str]) -> Optional[Dict]:
+        """
+        Fetch transcript via the YouTubeTranscriptApi fallback chain (blocking).
+        Returns {"transcript", "source"} or None.
+        """
+        try:
+            from youtube_transcript_api import YouTubeTranscriptApi
+            logger.info(f"Attempting transcript extraction with YouTubeTranscriptApi for: {video_id}")
+            
+            try:
+                # Get list of available transcripts
+                # Pass cookies if available
+                transcript_list = YouTubeTranscriptApi.list_transcripts(video_id, cookies=cookie_file)
+                
+                # Try to find best English transcript
                 try:
-                    os.unlink(cookie_file)
-                except Exception as e:
-                    logger.warning(f"Failed to remove temp cookie file: {e}")
+                    # 1. Manual English
+                    t = transcript_list.find_manually_created_transcript(TRANSCRIPT_LANGUAGES)
+                    logger.info(f"Found manual English transcript: {t.language_code}")
+                except:
+                    try:
+                        # 2. Generated English
+                        t = transcript_list.find_generated_transcript(TRANSCRIPT_LANGUAGES)
+                        logger.info(f"Found generated English transcript: {t.language_code}")
+                    except:
+                        # 3. Any English (might be translated)
+                        t = transcript_list.find_transcript(TRANSCRIPT_LANGUAGES)
+                        logger.info(f"Found some English transcript: {t.language_code}")
+                
+                transcript_data = t.fetch()
+                logger.info("Transcript fetched successfully via YouTubeTranscriptApi")
+                language = t.language_code
+            except Exception as e:
+                logger.warning(f"YouTubeTranscriptApi (list_transcripts) failed: {str(e)}")
+                # Fallback to direct get_transcript (also pass cookies)
+                transcript_data = YouTubeTranscriptApi.get_transcript(video_id, languages=TRANSCRIPT_LANGUAGES, cookies=cookie_file)
+                logger.info("Transcript fetched successfully via direct get_transcript")
+                language = TRANSCRIPT_LANGUAGES[0]
+
+            transcript = Transcript.from_segments(transcript_data, language=language)
+            if not transcript:
+                return None
+            return {"transcript": transcript, "source": "transcript_api"}
+        except Exception as e:
+            error_details.append(f"YouTubeTranscriptApi failed: {str(e)}")
+            logger.warning(f"YouTubeTranscriptApi failed: {str(e)}")
+            return None
+
+    def _fetch_metadata(self, video_id: str, cookie_file: Optional[str], error_details: List[str]) -> Dict:
+        """
+        Fetch title, duration and thumbnail with yt-dlp (blocking).
+        The English subtitle tracks are returned under "subtitle_tracks" for
+        the fallback path; nothing is downloaded here.
+        """
+        metadata = self._default_metadata(video_id)
+        
+        try:
+            ydl = self._get_ydl(cookie_file)
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+            metadata["title"] = info.get('title', metadata["title"])
+            metadata["duration"] = info.get('duration', metadata["duration"])
+            metadata["thumbnail"] = info.get('thumbnail', metadata["thumbnail"])
+            metadata["chapters"] = normalize_chapters(info.get('chapters'))
+            
+            # Keep the subtitle tracks in case the transcript API comes up empty
+            subtitles = info.get('subtitles') or {}
+            automatic_captions = info.get('automatic_captions') or {}
+            metadata["subtitle_tracks"] = subtitles.get('en') or automatic_captions.get('en')
+            metadata["complete"] = True
+        except Exception as e:
+            error_details.append(f"yt-dlp metadata fetch failed: {str(e)}")
+            logger.warning(f"yt-dlp failed: {str(e)}")
+        
+        return metadata
     
-    def _extract_text_from_subtitles(self, subtitle_tracks):
-        """Extract text from subtitle tracks"""
+    def _extract_segments_from_subtitles(self, subtitle_tracks) -> Optional[Transcript]:
+        """Extract timed segments from yt-dlp json3 subtitle tracks"""
         try:
             # Find json3 format
             for track in subtitle_tracks:
                 if track.get('ext') == 'json3':
                     url = track.get('url')
                     if url:
-                        import requests
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-                        }
-                        response = requests.get(url, headers=headers, timeout=10)
+                        # Pooled keep-alive session shared by all workers
+                        response = self.http.get(url, timeout=10)
                         data = response.json()
                         
-                        # Extract text from events
-                        texts = []
+                        # One segment per caption event
+                        transcript = Transcript(language="en")
                         for event in data.get('events', []):
                             if 'segs' in event:
+                                texts = []
                                 for seg in event['segs']:
                                     text = seg.get('utf8', '').strip()
                                     if text:
                                         texts.append(text)
+                                if texts:
+                                    transcript.append(
+                                        event.get('tStartMs', 0) / 1000.0,
+                                        event.get('dDurationMs', 0) / 1000.0,
+                                        ' '.join(texts)
+                                    )
                         
-                        return ' '.join(texts)
+                        return transcript or None
             
             return None
         except Exception as e:
             logger.error(f"Error extracting subtitle text: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+
+_youtube_service: Optional[YouTubeService] = None
+
+
+def get_youtube_service() -> YouTubeService:
+    """Return the process-wide YouTubeService"""
+    global _youtube_service
+    if _youtube_service is None:
+        _youtube_service = YouTubeService()
+    return _youtube_service
@@ -0,0 +1,41 @@
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared worker pool used for blocking YouTube calls
+    (YouTubeTranscriptApi, yt-dlp, subtitle downloads).
+    Size is controlled by YOUTUBE_WORKERS.
+    """
+    global _executor
+    if _executor is None:
+        max_workers = int(os.getenv("YOUTUBE_WORKERS", 8))
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="youtube-worker")
+        logger.info(f"YouTube worker pool started with {max_workers} workers")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking callable on the shared worker pool without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Stop the shared worker pool (called on application shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        logger.info("YouTube worker pool stopped")
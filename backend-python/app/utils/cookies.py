@@ -0,0 +1,65 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CookieFile:
+    """
+    Netscape cookie file materialized from an environment variable.
+
+    The file is written once and reused across requests; it is only
+    rewritten (under a new name, so long-lived yt-dlp instances notice)
+    when the variable's value changes.
+    """
+
+    def __init__(self, env_var: str = "YOUTUBE_COOKIES"):
+        self.env_var = env_var
+        self._lock = threading.Lock()
+        self._digest: Optional[str] = None
+        self._path: Optional[str] = None
+
+    def path(self) -> Optional[str]:
+        """Current cookie file path, or None if the variable is unset"""
+        content = os.getenv(self.env_var)
+        if not content:
+            if self._path:
+                self.remove()
+            return None
+
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+        if digest == self._digest and self._path and os.path.exists(self._path):
+            return self._path
+
+        with self._lock:
+            if digest != self._digest or not (self._path and os.path.exists(self._path)):
+                try:
+                    fd, path = tempfile.mkstemp(prefix=f"yt-cookies-{digest}-", suffix=".txt", text=True)
+                    with os.fdopen(fd, 'w') as f:
+                        f.write(content)
+                except Exception as e:
+                    logger.error(f"Failed to create cookies file: {str(e)}")
+                    return None
+
+                previous = self._path
+                self._path, self._digest = path, digest
+                self._unlink(previous)
+                logger.info("YouTube cookies file written")
+            return self._path
+
+    def remove(self):
+        with self._lock:
+            self._unlink(self._path)
+            self._path, self._digest = None, None
+
+    @staticmethod
+    def _unlink(path: Optional[str]):
+        if path and os.path.exists(path):
+            try:
+                os.unlink(path)
+            except Exception as e:
+                logger.warning(f"Failed to remove cookie file: {e}")
@@ -0,0 +1,20 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """
+    Keep-alive HTTP session with a connection pool sized for the worker pool
+    and a small retry policy for transient connection errors and 5xx.
+    """
+    session = requests.Session()
+    session.headers.update({'User-Agent': DEFAULT_USER_AGENT})
+
+    retry = Retry(total=2, connect=2, read=1, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
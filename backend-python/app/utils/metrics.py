@@ -0,0 +1,263 @@
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Tuple
+
+INF_LABEL = 'le="+Inf"'
+
+# Buckets (seconds) sized for a pipeline whose stages range from cache
+# lookups (ms) to multi-minute map-reduce runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines for every labelled series"""
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [[0] * len(self.buckets), 0.0, 0]
+                self._values[key] = state
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, INF_LABEL)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Minimal Prometheus registry rendering the text exposition format.
+    Collectors are callbacks run at scrape time to refresh gauges from
+    components that keep their own counters (cache, rate limiter, ...).
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Pipeline metrics
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "summtube_stage_duration_seconds",
+    "Duration of each summarize pipeline stage",
+    ["stage"]
+))
+TRANSCRIPT_SOURCE = REGISTRY.register(Counter(
+    "summtube_transcript_source_total",
+    "Transcripts obtained, by the fallback path that succeeded",
+    ["source"]
+))
+TRANSCRIPT_FAILURES = REGISTRY.register(Counter(
+    "summtube_transcript_failures_total",
+    "Videos for which no transcript could be fetched"
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "summtube_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"]
+))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "summtube_cache_hit_ratio",
+    "Lifetime hit ratio per cache",
+    ["cache"]
+))
+GEMINI_TOKENS = REGISTRY.register(Counter(
+    "summtube_gemini_tokens_total",
+    "Gemini tokens by direction (prompt/response) and model",
+    ["kind", "model"]
+))
+GEMINI_REQUESTS = REGISTRY.register(Counter(
+    "summtube_gemini_requests_total",
+    "Gemini calls by model and outcome",
+    ["model", "outcome"]
+))
+TRANSCRIPT_TOKENS = REGISTRY.register(Counter(
+    "summtube_transcript_tokens_total",
+    "Estimated transcript tokens before (original) and after (normalized) prompt preprocessing",
+    ["stage"]
+))
+COALESCED_REQUESTS = REGISTRY.register(Counter(
+    "summtube_coalesced_requests_total",
+    "Requests served by joining an identical in-flight request"
+))
+IN_FLIGHT_SUMMARIES = REGISTRY.register(Gauge(
+    "summtube_in_flight_summaries",
+    "Distinct summaries currently being generated"
+))
+RATE_LIMIT_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "summtube_gemini_queue_depth",
+    "Gemini calls waiting for client-side quota",
+    ["model"]
+))
+RATE_LIMIT_WAIT = REGISTRY.register(Histogram(
+    "summtube_gemini_queue_wait_seconds",
+    "Time Gemini calls waited for client-side quota",
+    ["priority", "model"]
+))
+GEMINI_LATENCY = REGISTRY.register(Histogram(
+    "summtube_gemini_call_duration_seconds",
+    "Latency of successful Gemini calls by model",
+    ["model"]
+))
+GEMINI_COST = REGISTRY.register(Counter(
+    "summtube_gemini_cost_usd_total",
+    "Estimated Gemini spend by model, from token usage and GEMINI_PRICING",
+    ["model"]
+))
+ROUTING_DECISIONS = REGISTRY.register(Counter(
+    "summtube_model_routing_total",
+    "Model chosen for each summary, by tier and reason",
+    ["tier", "model", "reason"]
+))
+MODEL_FAILOVERS = REGISTRY.register(Counter(
+    "summtube_model_failovers_total",
+    "Gemini calls moved to another model after a 429 or timeout",
+    ["from_model", "to_model", "reason"]
+))
+BATCH_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "summtube_batch_queue_depth",
+    "Batch items waiting for a worker"
+))
+
+# HTTP metrics
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "summtube_http_in_flight_requests",
+    "HTTP requests currently being served"
+))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    "summtube_http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "path", "status"]
+))
+
+
+def render_latest() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,306 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import random
+import re
+import time
+from typing import Dict, Optional, Tuple
+from app.utils.metrics import RATE_LIMIT_WAIT
+from app.utils.shared_state import SharedState, get_shared_state
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Shared-bucket errors (e.g. "database is locked"): back off between
+# attempts, and after this many in a row use the local buckets for a while
+SHARED_ERROR_BACKOFF = 0.25
+SHARED_ERROR_BACKOFF_MAX = 5.0
+SHARED_MAX_FAILURES = 3
+SHARED_RETRY_AFTER = 30.0
+
+# Priority of the work running in the current task; batch workers lower it
+request_priority: contextvars.ContextVar[int] = contextvars.ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextlib.contextmanager
+def priority(level: int):
+    """Run the enclosed calls (and tasks they spawn) at the given limiter priority"""
+    token = request_priority.set(level)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate tokens/second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, rate_factor: float):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate * rate_factor)
+        self.updated = now
+
+    def time_until(self, amount: float, rate_factor: float = 1.0) -> float:
+        """Seconds until amount tokens are available (0 if available now)"""
+        self._refill(rate_factor)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / (self.rate * rate_factor)
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Process-wide client-side throttle for Gemini.
+
+    Callers acquire one request plus their estimated prompt tokens against
+    requests-per-minute and tokens-per-minute buckets. Waiters are served
+    in priority order (interactive before batch, FIFO within a priority).
+    On a 429 the limiter pauses until the retry-after time and halves its
+    effective rate; each success restores a little of it (AIMD).
+
+    With a cross-process shared_state the buckets live there, so the
+    RPM/TPM limits hold for all worker processes together; queueing and
+    priorities stay per process.
+    """
+
+    def __init__(self, rpm: int, tpm: int, shared_state: Optional[SharedState] = None, name: str = "default"):
+        self.name = name
+        self.requests = TokenBucket(rpm / 60.0, max(1, rpm // 10))
+        self.tokens = TokenBucket(tpm / 60.0, max(1, tpm // 10))
+        self.shared_state = shared_state
+        self.rate_factor = 1.0
+        self._pause_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._shared_failures = 0
+        self._shared_down_until = 0.0
+
+        # Metrics
+        self.granted = 0
+        self.throttled = 0
+        self.retries = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def acquire(self, tokens: int = 0, level: Optional[int] = None):
+        """Wait until a request with the given token estimate may be sent"""
+        if level is None:
+            level = request_priority.get()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        enqueued = time.monotonic()
+        heapq.heappush(self._waiters, (level, next(self._seq), tokens, future))
+
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.ensure_future(self._pump())
+        self._wakeup.set()
+
+        await future
+
+        waited = time.monotonic() - enqueued
+        self.granted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        RATE_LIMIT_WAIT.observe(waited, priority=str(level), model=self.name)
+        if waited > 1:
+            logger.info(f"Gemini request waited {waited:.2f}s for {self.name} quota (priority {level})")
+
+    async def _pump(self):
+        try:
+            await self._grant_waiters()
+        except Exception as e:
+            # Never leave callers waiting on a dead pump
+            logger.exception(f"Gemini {self.name} rate limiter failed: {e}")
+            while self._waiters:
+                future = heapq.heappop(self._waiters)[3]
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _grant_waiters(self):
+        while self._waiters:
+            level, seq, tokens, future = self._waiters[0]
+            if future.done():
+                # Cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+
+            wait = self._pause_until - time.monotonic()
+            if wait <= 0 and self._use_shared():
+                try:
+                    wait = await asyncio.to_thread(self.shared_state.take_tokens, self._shared_buckets(tokens))
+                except Exception as e:
+                    wait = self._shared_error(e)
+                else:
+                    self._shared_failures = 0
+                    if wait <= 0:
+                        # Left in the heap (other waiters may have been pushed meanwhile); popped once done
+                        if not future.done():
+                            future.set_result(None)
+                        continue
+            elif wait <= 0:
+                wait = max(
+                    self.requests.time_until(1, self.rate_factor),
+                    self.tokens.time_until(tokens, self.rate_factor)
+                )
+                if wait <= 0:
+                    heapq.heappop(self._waiters)
+                    self.requests.consume(1)
+                    self.tokens.consume(tokens)
+                    future.set_result(None)
+                    continue
+
+            # Sleep until quota frees up or a new (possibly higher priority) waiter arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _use_shared(self) -> bool:
+        return self.shared_state is not None and time.monotonic() >= self._shared_down_until
+
+    def _shared_error(self, e: Exception) -> float:
+        """Note a failed shared-bucket call; returns seconds to back off"""
+        self._shared_failures += 1
+        if self._shared_failures >= SHARED_MAX_FAILURES:
+            self._shared_failures = 0
+            self._shared_down_until = time.monotonic() + SHARED_RETRY_AFTER
+            logger.error(
+                f"Shared {self.name} quota unavailable ({e}); using per-process limits for {SHARED_RETRY_AFTER:.0f}s"
+            )
+            return 0.0
+        delay = min(SHARED_ERROR_BACKOFF_MAX, SHARED_ERROR_BACKOFF * 2 ** (self._shared_failures - 1))
+        logger.warning(f"Shared {self.name} quota check failed ({e}); retrying in {delay:.2f}s")
+        return delay
+
+    def _shared_buckets(self, tokens: int) -> Dict:
+        return {
+            f"gemini:{self.name}:requests": (1, self.requests.rate * self.rate_factor, self.requests.capacity),
+            f"gemini:{self.name}:tokens": (tokens, self.tokens.rate * self.rate_factor, self.tokens.capacity)
+        }
+
+    def estimated_wait(self, tokens: int = 0) -> float:
+        """
+        Rough seconds a new request would wait for quota: any 429 pause,
+        plus the time to refill for everything already queued and itself.
+        Used to route work away from a saturated model.
+        """
+        pause = max(0.0, self._pause_until - time.monotonic())
+        queued = [entry for entry in self._waiters if not entry[3].done()]
+        requests_needed = len(queued) + 1
+        tokens_needed = sum(entry[2] for entry in queued) + tokens
+        refill = max(
+            self.requests.time_until(min(requests_needed, self.requests.capacity), self.rate_factor)
+            + max(0, requests_needed - self.requests.capacity) / (self.requests.rate * self.rate_factor),
+            self.tokens.time_until(min(tokens_needed, self.tokens.capacity), self.rate_factor)
+            + max(0, tokens_needed - self.tokens.capacity) / (self.tokens.rate * self.rate_factor)
+        )
+        return pause + refill
+
+    def record_success(self):
+        self.rate_factor = min(1.0, self.rate_factor + 0.05)
+
+    def record_throttle(self, retry_after: float):
+        """Back off globally after a 429"""
+        self.throttled += 1
+        self.rate_factor = max(0.1, self.rate_factor * 0.5)
+        self._pause_until = max(self._pause_until, time.monotonic() + retry_after)
+        self._wakeup.set()
+        logger.warning(f"Gemini {self.name} throttled; pausing {retry_after:.1f}s, rate factor now {self.rate_factor:.2f}")
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": sum(1 for *_, future in self._waiters if not future.done()),
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "avg_wait": round(self.total_wait / self.granted, 4) if self.granted else 0.0,
+            "max_wait": round(self.max_wait, 4),
+            "rate_factor": round(self.rate_factor, 2),
+            "estimated_wait": round(self.estimated_wait(), 3),
+            "shared_buckets": self.shared_state is not None
+        }
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """Extract a server-suggested retry delay (seconds) from a Gemini error, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers and headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+
+    message = str(error)
+    for pattern in (r"retry in ([\d.]+)\s*s", r"retry_delay\s*\{\s*seconds:\s*(\d+)", r"retry-after:?\s*([\d.]+)"):
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+
+
+def _model_limits(model: str) -> Tuple[int, int]:
+    """
+    (RPM, TPM) for a model: GEMINI_RPM / GEMINI_TPM, overridden per model by
+    GEMINI_MODEL_LIMITS, e.g. "gemini-2.5-flash-lite=4000/4000000,gemini-2.5-pro=150/2000000"
+    """
+    rpm = int(os.getenv("GEMINI_RPM", 60))
+    tpm = int(os.getenv("GEMINI_TPM", 1000000))
+    for entry in os.getenv("GEMINI_MODEL_LIMITS", "").split(","):
+        name, _, limits = entry.strip().partition("=")
+        if name == model and limits:
+            model_rpm, _, model_tpm = limits.partition("/")
+            rpm = int(model_rpm)
+            tpm = int(model_tpm) if model_tpm else tpm
+    return rpm, tpm
+
+
+def get_rate_limiter(model: str = "default") -> RateLimiter:
+    """
+    Return the process-wide rate limiter for a Gemini model (quotas are
+    per model). Configured by GEMINI_RPM, GEMINI_TPM and GEMINI_MODEL_LIMITS;
+    the limits are shared by all worker processes when the shared state
+    backend is cross-process.
+    """
+    limiter = _rate_limiters.get(model)
+    if limiter is None:
+        rpm, tpm = _model_limits(model)
+        shared_state = get_shared_state()
+        limiter = RateLimiter(rpm, tpm, shared_state if shared_state.shared_across_processes else None, name=model)
+        _rate_limiters[model] = limiter
+        logger.info(f"Gemini rate limiter for {model} initialized ({rpm} RPM, {tpm} TPM)")
+    return limiter
+
+
+def get_rate_limiters() -> Dict[str, RateLimiter]:
+    """Every rate limiter created so far, keyed by model"""
+    return dict(_rate_limiters)
@@ -0,0 +1,386 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState(ABC):
+    """
+    State shared by every worker process: a JSON key/value store with TTL,
+    leased locks (cross-process single-flight) and token buckets (Gemini
+    quota). Methods are blocking; async callers run them with
+    asyncio.to_thread.
+    """
+
+    # True when other processes see the same state
+    shared_across_processes = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float = 0):
+        ...
+
+    @abstractmethod
+    def set_many(self, values: Dict[str, Any], ttl: float = 0):
+        """Set several keys at once (one transaction where the backend has them)"""
+
+    @abstractmethod
+    def get_prefix(self, prefix: str) -> Dict[str, Any]:
+        """Every live key starting with prefix, with its value"""
+
+    @abstractmethod
+    def expire_prefix(self, prefix: str, ttl: float):
+        """Reset the TTL of every live key starting with prefix"""
+
+    @abstractmethod
+    def update(self, key: str, fn: Callable[[Optional[Any]], Any], ttl: float = 0) -> Any:
+        """Atomically replace the value with fn(current value or None) and return it"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str):
+        ...
+
+    @abstractmethod
+    def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        """Take (or extend, if already held by owner) a lock that expires after ttl seconds"""
+
+    @abstractmethod
+    def release_lock(self, name: str, owner: str):
+        ...
+
+    @abstractmethod
+    def take_tokens(self, buckets: Dict[str, Tuple[float, float, float]]) -> float:
+        """
+        Atomically take amount from every bucket, given as
+        {name: (amount, rate per second, capacity)}. Returns 0 when taken,
+        otherwise the seconds until all of them could be (nothing is taken).
+        """
+
+    def purge_expired(self):
+        pass
+
+    def stats(self) -> Dict:
+        return {"backend": type(self).__name__}
+
+    def close(self):
+        pass
+
+
+def _bucket_wait(tokens: float, updated: float, now: float, amount: float, rate: float, capacity: float) -> Tuple[float, float]:
+    """Refill a bucket to now; returns (available tokens, seconds until amount is available)"""
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    amount = min(amount, capacity)
+    if tokens >= amount:
+        return tokens, 0.0
+    return tokens, (amount - tokens) / rate
+
+
+class LocalSharedState(SharedState):
+    """In-process stand-in used when the service runs as a single worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, Tuple[Any, float]] = {}
+        self._locks: Dict[str, Tuple[str, float]] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._get(key, time.time())
+
+    def _get(self, key: str, now: float) -> Optional[Any]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at and expires_at < now:
+            del self._values[key]
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float = 0):
+        with self._lock:
+            self._values[key] = (json.dumps(value), time.time() + ttl if ttl else 0)
+
+    def set_many(self, values: Dict[str, Any], ttl: float = 0):
+        with self._lock:
+            expires_at = time.time() + ttl if ttl else 0
+            for key, value in values.items():
+                self._values[key] = (json.dumps(value), expires_at)
+
+    def get_prefix(self, prefix: str) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            values = {}
+            for key in [k for k in self._values if k.startswith(prefix)]:
+                value = self._get(key, now)
+                if value is not None:
+                    values[key] = value
+            return values
+
+    def expire_prefix(self, prefix: str, ttl: float):
+        with self._lock:
+            expires_at = time.time() + ttl if ttl else 0
+            for key, (value, _) in list(self._values.items()):
+                if key.startswith(prefix):
+                    self._values[key] = (value, expires_at)
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Any], ttl: float = 0) -> Any:
+        with self._lock:
+            now = time.time()
+            value = fn(self._get(key, now))
+            self._values[key] = (json.dumps(value), now + ttl if ttl else 0)
+            return value
+
+    def delete(self, key: str):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._values if k.startswith(prefix)]:
+                del self._values[key]
+
+    def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        with self._lock:
+            now = time.time()
+            holder = self._locks.get(name)
+            if holder and holder[0] != owner and holder[1] > now:
+                return False
+            self._locks[name] = (owner, now + ttl)
+            return True
+
+    def release_lock(self, name: str, owner: str):
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder and holder[0] == owner:
+                del self._locks[name]
+
+    def take_tokens(self, buckets: Dict[str, Tuple[float, float, float]]) -> float:
+        with self._lock:
+            now = time.time()
+            refilled, wait = {}, 0.0
+            for name, (amount, rate, capacity) in buckets.items():
+                tokens, updated = self._buckets.get(name, (capacity, now))
+                refilled[name], bucket_wait = _bucket_wait(tokens, updated, now, amount, rate, capacity)
+                wait = max(wait, bucket_wait)
+            for name, (amount, rate, capacity) in buckets.items():
+                taken = 0 if wait else min(amount, capacity)
+                self._buckets[name] = (refilled[name] - taken, now)
+            return wait
+
+    def purge_expired(self):
+        with self._lock:
+            now = time.time()
+            for key in [k for k, (_, expires_at) in self._values.items() if expires_at and expires_at < now]:
+                del self._values[key]
+
+
+class SQLiteSharedState(SharedState):
+    """
+    Shared state in a SQLite database in WAL mode, for worker processes on
+    one host (or a volume they all mount). Each thread keeps its own
+    connection; read-modify-write operations run in BEGIN IMMEDIATE
+    transactions so they are atomic across processes.
+    """
+
+    shared_across_processes = True
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+        logger.info(f"SQLite shared state opened at {path}")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn())
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        value, expires_at = row
+        if expires_at and expires_at < time.time():
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float = 0):
+        expires_at = time.time() + ttl if ttl else 0
+        self._conn().execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), expires_at)
+        )
+
+    def set_many(self, values: Dict[str, Any], ttl: float = 0):
+        expires_at = time.time() + ttl if ttl else 0
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), expires_at) for key, value in values.items()]
+            )
+
+    def get_prefix(self, prefix: str) -> Dict[str, Any]:
+        rows = self._conn().execute(
+            "SELECT key, value FROM kv WHERE key >= ? AND key < ? AND (expires_at = 0 OR expires_at >= ?)",
+            (prefix, _prefix_end(prefix), time.time())
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def expire_prefix(self, prefix: str, ttl: float):
+        self._conn().execute(
+            "UPDATE kv SET expires_at = ? WHERE key >= ? AND key < ?",
+            (time.time() + ttl if ttl else 0, prefix, _prefix_end(prefix))
+        )
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Any], ttl: float = 0) -> Any:
+        with self._transaction() as conn:
+            now = time.time()
+            row = conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+            current = None
+            if row and not (row[1] and row[1] < now):
+                current = json.loads(row[0])
+            value = fn(current)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl else 0)
+            )
+            return value
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str):
+        self._conn().execute("DELETE FROM kv WHERE key >= ? AND key < ?", (prefix, _prefix_end(prefix)))
+
+    def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        with self._transaction() as conn:
+            now = time.time()
+            row = conn.execute("SELECT owner, expires_at FROM locks WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO locks (name, owner, expires_at) VALUES (?, ?, ?)",
+                (name, owner, now + ttl)
+            )
+            return True
+
+    def release_lock(self, name: str, owner: str):
+        self._conn().execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+    def take_tokens(self, buckets: Dict[str, Tuple[float, float, float]]) -> float:
+        with self._transaction() as conn:
+            # Wall-clock time: monotonic clocks are not comparable across processes
+            now = time.time()
+            refilled, wait = {}, 0.0
+            for name, (amount, rate, capacity) in buckets.items():
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                refilled[name], bucket_wait = _bucket_wait(tokens, updated, now, amount, rate, capacity)
+                wait = max(wait, bucket_wait)
+            for name, (amount, rate, capacity) in buckets.items():
+                taken = 0 if wait else min(amount, capacity)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (name, refilled[name] - taken, now)
+                )
+            return wait
+
+    def purge_expired(self):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM kv WHERE expires_at > 0 AND expires_at < ?", (now,))
+            conn.execute("DELETE FROM locks WHERE expires_at < ?", (now,))
+
+    def stats(self) -> Dict:
+        return {"backend": type(self).__name__, "path": self.path}
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+
+
+def _prefix_end(prefix: str) -> str:
+    """Upper bound for a key range scan: every key starting with prefix sorts below it"""
+    return prefix + "\U0010ffff"
+
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a block, taking the write lock up front"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def get_worker_count() -> int:
+    """Number of server worker processes (WEB_CONCURRENCY, as read by uvicorn)"""
+    return max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+
+_shared_state: Optional[SharedState] = None
+
+
+def get_shared_state() -> SharedState:
+    """
+    Return the process-wide shared state backend.
+    Configured by SHARED_STATE_BACKEND ("local" or "sqlite"; defaults to
+    "sqlite" when WEB_CONCURRENCY > 1) and SHARED_STATE_PATH.
+    """
+    global _shared_state
+    if _shared_state is None:
+        default_backend = "sqlite" if get_worker_count() > 1 else "local"
+        backend = os.getenv("SHARED_STATE_BACKEND", default_backend).lower()
+        if backend == "sqlite":
+            _shared_state = SQLiteSharedState(os.getenv("SHARED_STATE_PATH", "data/shared_state.db"))
+        else:
+            _shared_state = LocalSharedState()
+        logger.info(f"Shared state initialized ({backend})")
+    return _shared_state
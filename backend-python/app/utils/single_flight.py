@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.utils.shared_state import SharedState
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key onto one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and receive the same result or
+    exception. The work runs as its own task, so a disconnecting caller does
+    not cancel it for everyone else.
+
+    With a cross-process shared_state the in-process leader also takes a
+    leased lock for the key, so only one worker process runs fn() at a
+    time; the others poll lookup() until that worker's result appears.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        shared_state: Optional[SharedState] = None,
+        lock_ttl: float = 120,
+        poll_interval: float = 0.5
+    ):
+        self.name = name
+        self.shared_state = shared_state
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.remote_waits = 0
+        self.failures = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        lookup: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Run fn() once per key at a time.
+        Returns (result, shared) where shared is True if this caller joined
+        a call started by someone else. lookup() returns the finished
+        result (or None) when another process holds the key's lock.
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+
+        if shared:
+            self.coalesced += 1
+            logger.info(f"[{self.name}] Coalesced request onto in-flight call for {key[:12]}")
+        else:
+            self.leaders += 1
+            if self.shared_state is not None and self.shared_state.shared_across_processes:
+                task = asyncio.ensure_future(self._lead(key, fn, lookup))
+            else:
+                task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+
+        result = await asyncio.shield(task)
+        return result, shared
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[Any]], lookup: Optional[Callable[[], Awaitable[Any]]]) -> Any:
+        """Run fn() under the key's cross-process lock, or wait for the process holding it"""
+        lock_name = f"{self.name}:{key}"
+        waited = False
+        while not await asyncio.to_thread(self.shared_state.acquire_lock, lock_name, self._owner, self.lock_ttl):
+            if not waited:
+                waited = True
+                self.remote_waits += 1
+                logger.info(f"[{self.name}] Waiting for another worker computing {key[:12]}")
+            await asyncio.sleep(self.poll_interval)
+            if lookup:
+                result = await lookup()
+                if result is not None:
+                    return result
+
+        try:
+            if waited and lookup:
+                # The other worker may have finished between our last poll and its release
+                result = await lookup()
+                if result is not None:
+                    return result
+
+            heartbeat = asyncio.ensure_future(self._keep_lock(lock_name))
+            try:
+                return await fn()
+            finally:
+                heartbeat.cancel()
+        finally:
+            await asyncio.to_thread(self.shared_state.release_lock, lock_name, self._owner)
+
+    async def _keep_lock(self, lock_name: str):
+        """Extend the lease while fn() runs; a crashed worker's lock lapses after lock_ttl"""
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            await asyncio.to_thread(self.shared_state.acquire_lock, lock_name, self._owner, self.lock_ttl)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Retrieve the exception so it is never reported as unhandled when
+        # every waiter has gone away
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    def stats(self) -> Dict:
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "remote_waits": self.remote_waits,
+            "failures": self.failures,
+            "coalesce_rate": round(self.coalesced / total, 4) if total else 0.0
+        }
@@ -0,0 +1,48 @@
+import contextlib
+import logging
+import os
+import time
+from app.utils.metrics import STAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+# OpenTelemetry is optional: spans are only exported when the API package is
+# installed and TRACING_ENABLED is set; stage histograms are always recorded
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+_tracer = None
+_tracer_resolved = False
+
+
+def get_tracer():
+    """
+    Return the OpenTelemetry tracer, or None when tracing is off.
+    Resolved on first use so TRACING_ENABLED from .env (loaded by main.py
+    after the app modules are imported) is honoured.
+    """
+    global _tracer, _tracer_resolved
+    if not _tracer_resolved:
+        if otel_trace is not None and os.getenv("TRACING_ENABLED", "False").lower() == "true":
+            _tracer = otel_trace.get_tracer("summtube")
+            logger.info("OpenTelemetry tracing enabled")
+        _tracer_resolved = True
+    return _tracer
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """
+    Time a pipeline stage: observes summtube_stage_duration_seconds{stage=name}
+    and, when tracing is enabled, wraps the block in an OpenTelemetry span.
+    """
+    start = time.perf_counter()
+    tracer = get_tracer()
+    otel_cm = tracer.start_as_current_span(name, attributes=attributes) if tracer else contextlib.nullcontext()
+    try:
+        with otel_cm:
+            yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, stage=name)
@@ -0,0 +1,206 @@
+import bisect
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Rough heuristic for English text with Gemini tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def format_timestamp(seconds: float) -> str:
+    """Render seconds as m:ss, or h:mm:ss for videos longer than an hour"""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+class Transcript:
+    """
+    Compact time-aligned transcript.
+
+    Segment start times and durations live in flat float arrays and the
+    caption texts are interned, so rolling captions and repeated markers
+    share one string. The joined text is built once on demand; chunks are
+    rendered straight from the segment range they cover. Chapters (from
+    yt-dlp) are kept as {"title", "start", "end"} dicts.
+    """
+
+    __slots__ = ("starts", "durations", "texts", "language", "chapters", "_char_count", "_text")
+
+    def __init__(self, language: Optional[str] = None, chapters: Optional[List[Dict]] = None):
+        self.starts = array("d")
+        self.durations = array("f")
+        self.texts: List[str] = []
+        self.language = language
+        self.chapters = chapters or []
+        self._char_count = 0
+        self._text: Optional[str] = None
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict], language: Optional[str] = None, chapters: Optional[List[Dict]] = None) -> "Transcript":
+        """Build from {"text", "start", "duration"} dicts (YouTubeTranscriptApi shape)"""
+        transcript = cls(language, chapters)
+        for seg in segments:
+            transcript.append(seg.get("start", 0.0), seg.get("duration", 0.0), seg["text"])
+        return transcript
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[List], language: Optional[str] = None, chapters: Optional[List[Dict]] = None) -> "Transcript":
+        """Build from [start, duration, text] rows (transcript store shape)"""
+        transcript = cls(language, chapters)
+        for start, duration, text in rows:
+            transcript.append(start, duration, text)
+        return transcript
+
+    def append(self, start: float, duration: float, text: str):
+        text = text.strip()
+        if not text:
+            return
+        if self.texts:
+            # Joined with a single space
+            self._char_count += 1
+        self.starts.append(float(start or 0.0))
+        self.durations.append(float(duration or 0.0))
+        self.texts.append(sys.intern(text))
+        self._char_count += len(text)
+        self._text = None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Tuple[float, float, str]]:
+        return zip(self.starts, self.durations, self.texts)
+
+    @property
+    def text(self) -> str:
+        """Full transcript as one string (built once, then cached)"""
+        if self._text is None:
+            self._text = " ".join(self.texts)
+        return self._text
+
+    @property
+    def char_count(self) -> int:
+        """Length of text, known without joining"""
+        return self._char_count
+
+    @property
+    def end(self) -> float:
+        if not self.texts:
+            return 0.0
+        return self.starts[-1] + self.durations[-1]
+
+    def rows(self) -> List[List]:
+        return [[round(start, 3), round(duration, 3), text] for start, duration, text in self]
+
+    def segments(self) -> List[Dict]:
+        return [{"start": start, "duration": duration, "text": text} for start, duration, text in self]
+
+    def index_at(self, seconds: float) -> int:
+        """Index of the first segment starting at or after seconds"""
+        return bisect.bisect_left(self.starts, seconds)
+
+    def render(self, first: int = 0, last: Optional[int] = None, timestamp_every: float = 0) -> str:
+        """
+        Text of segments [first, last). With timestamp_every > 0 a [m:ss]
+        marker is inserted before the first segment and then whenever at
+        least that many seconds have passed since the previous marker.
+        """
+        last = len(self.texts) if last is None else last
+        if not timestamp_every:
+            if first == 0 and last == len(self.texts):
+                return self.text
+            return " ".join(self.texts[first:last])
+
+        parts = []
+        next_marker = None
+        for i in range(first, last):
+            start = self.starts[i]
+            if next_marker is None or start >= next_marker:
+                parts.append(f"[{format_timestamp(start)}]")
+                next_marker = start + timestamp_every
+            parts.append(self.texts[i])
+        return " ".join(parts)
+
+    def chunk_by_chars(self, budget_chars: int, timestamp_every: float = 0, first: int = 0, last: Optional[int] = None) -> List[Dict]:
+        """Group segments into chunks of at most budget_chars characters, never splitting a segment"""
+        last = len(self.texts) if last is None else last
+        chunks = []
+        chunk_first, size = first, 0
+
+        for i in range(first, last):
+            length = len(self.texts[i]) + 1
+            if i > chunk_first and size + length > budget_chars:
+                chunks.append(self._chunk(chunk_first, i, timestamp_every))
+                chunk_first, size = i, 0
+            size += length
+
+        if chunk_first < last:
+            chunks.append(self._chunk(chunk_first, last, timestamp_every))
+        return chunks
+
+    def chunk_by_time(self, window_seconds: float, timestamp_every: float = 0) -> List[Dict]:
+        """Group segments into consecutive windows of window_seconds"""
+        chunks = []
+        first = 0
+        while first < len(self.texts):
+            last = max(first + 1, self.index_at(self.starts[first] + window_seconds))
+            chunks.append(self._chunk(first, last, timestamp_every))
+            first = last
+        return chunks
+
+    def chunk_by_chapters(self, budget_chars: int, timestamp_every: float = 0) -> List[Dict]:
+        """
+        One chunk per chapter carrying its title; chapters longer than
+        budget_chars are split further by size. Falls back to
+        chunk_by_chars when the video has no chapters.
+        """
+        if not self.chapters:
+            return self.chunk_by_chars(budget_chars, timestamp_every)
+
+        chunks = []
+        for position, chapter in enumerate(self.chapters):
+            # The first chapter also takes anything before its start, the last anything after its end
+            first = 0 if position == 0 else self.index_at(chapter["start"])
+            last = len(self.texts) if position == len(self.chapters) - 1 else self.index_at(self.chapters[position + 1]["start"])
+            if first >= last:
+                continue
+            parts = self.chunk_by_chars(budget_chars, timestamp_every, first, last)
+            for part_index, chunk in enumerate(parts):
+                chunk["title"] = chapter["title"] if len(parts) == 1 else f"{chapter['title']} ({part_index + 1}/{len(parts)})"
+                chunks.append(chunk)
+        return chunks
+
+    def _chunk(self, first: int, last: int, timestamp_every: float) -> Dict:
+        return {
+            "text": self.render(first, last, timestamp_every),
+            "start": self.starts[first],
+            "end": self.starts[last - 1] + self.durations[last - 1]
+        }
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the segment data (shared interned strings counted once)"""
+        unique = {id(text): text for text in self.texts}
+        return (
+            self.starts.itemsize * len(self.starts)
+            + self.durations.itemsize * len(self.durations)
+            + sys.getsizeof(self.texts)
+            + sum(sys.getsizeof(text) for text in unique.values())
+        )
+
+
+def normalize_chapters(chapters: Optional[Iterable[Dict]]) -> List[Dict]:
+    """Reduce yt-dlp chapter entries to {"title", "start", "end"}, sorted by start"""
+    normalized = []
+    for chapter in chapters or []:
+        start = chapter.get("start_time", chapter.get("start"))
+        if start is None:
+            continue
+        normalized.append({
+            "title": chapter.get("title") or f"Chapter {len(normalized) + 1}",
+            "start": float(start),
+            "end": float(chapter.get("end_time", chapter.get("end")) or 0.0)
+        })
+    return sorted(normalized, key=lambda c: c["start"])
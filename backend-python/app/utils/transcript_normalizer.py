@@ -0,0 +1,150 @@
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from app.utils.transcript import CHARS_PER_TOKEN, Transcript
+
+logger = logging.getLogger(__name__)
+
+# Caption words that mark non-speech; "__" is YouTube's bleeped "[ __ ]"
+NON_SPEECH_WORDS = r"music|applause|laughter|laughs|laughing|inaudible|silence|cheering|crosstalk|__"
+# [Music], [Applause], (laughter), [ __ ], ♪ ... ♪ and similar non-speech
+# captions; other brackets ("array[0]", "[sic]") are speech and kept
+MARKER_PATTERN = re.compile(
+    rf"\[\s*(?:{NON_SPEECH_WORDS})\b[^\]]*\]|\(\s*(?:{NON_SPEECH_WORDS})\b[^)]*\)|[♪♫]+",
+    re.IGNORECASE
+)
+# Standalone fillers only: "mm-hmm" and words like "umm's" are left alone
+FILLER_PATTERN = re.compile(r"(?<![\w'-])(?:um+|uh+|uhm+|erm+|hmm+)(?![\w'-])[,.]?\s*", re.IGNORECASE)
+# "mm" is also millimetres, so it only counts as a filler when it is the whole caption
+FILLER_ONLY_PATTERN = re.compile(r"^\s*mm+[,.!?]?\s*$", re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Shortest repeated prefix treated as rolling-caption overlap
+MIN_OVERLAP_WORDS = 2
+# Seconds a segment must start before the previous one ends to count as a rolling caption
+ROLLING_MIN_OVERLAP_SECONDS = 0.01
+# Sections kept when capping a transcript to the token budget
+BUDGET_SECTIONS = 10
+
+
+class TranscriptNormalizer:
+    """
+    Shrinks a transcript before it is put into a prompt: drops non-speech
+    markers and filler words, collapses whitespace, removes the repeated
+    prefix of rolling auto-captions (each line restating the end of the
+    previous one while still on screen, i.e. overlapping it in time) and,
+    with a token budget, keeps an evenly spread share of every part of the
+    video. Timestamps are preserved.
+    """
+
+    def __init__(
+        self,
+        strip_markers: bool = True,
+        strip_fillers: bool = True,
+        dedupe: bool = True,
+        token_budget: int = 0
+    ):
+        self.strip_markers = strip_markers
+        self.strip_fillers = strip_fillers
+        self.dedupe = dedupe
+        self.token_budget = token_budget
+
+    def normalize(self, transcript: Transcript) -> Tuple[Transcript, Dict[str, int]]:
+        """Return the cleaned transcript and the before/after token estimates"""
+        cleaned = Transcript(language=transcript.language, chapters=transcript.chapters)
+        previous_words: List[str] = []
+        previous_end = None
+
+        for start, duration, text in transcript:
+            if self.strip_markers:
+                text = MARKER_PATTERN.sub(" ", text)
+            if self.strip_fillers:
+                text = FILLER_ONLY_PATTERN.sub("", FILLER_PATTERN.sub("", text))
+            text = WHITESPACE_PATTERN.sub(" ", text).strip()
+            if not text:
+                continue
+
+            if self.dedupe:
+                words = text.lower().split(" ")
+                # Only auto-generated rolling captions overlap in time; manual
+                # captions that repeat words or whole lines are real speech
+                rolling = previous_end is not None and start < previous_end - ROLLING_MIN_OVERLAP_SECONDS
+                overlap = self._overlap(previous_words, words) if rolling else 0
+                # The next rolling line repeats the end of this raw line, not of what we keep
+                previous_words = words
+                previous_end = start + duration
+                if overlap == len(words):
+                    # Fully repeated line
+                    continue
+                if overlap:
+                    text = text.split(" ", overlap)[-1]
+
+            cleaned.append(start, duration, text)
+
+        if self.token_budget and cleaned.char_count > self.token_budget * CHARS_PER_TOKEN:
+            cleaned = self._cap(cleaned, self.token_budget * CHARS_PER_TOKEN)
+
+        return cleaned, {
+            "original": transcript.char_count // CHARS_PER_TOKEN,
+            "normalized": cleaned.char_count // CHARS_PER_TOKEN
+        }
+
+    @staticmethod
+    def _overlap(previous: List[str], current: List[str]) -> int:
+        """
+        Number of leading words of current that repeat the trailing words
+        of previous (both lowercased). A single shared word only counts
+        when it is the whole line, so "...in the" / "the end" is kept.
+        """
+        first = current[0]
+        for size in range(min(len(previous), len(current)), 0, -1):
+            if size < MIN_OVERLAP_WORDS and size != len(current):
+                break
+            # Cheap check before comparing whole slices
+            if previous[-size] == first and previous[-size:] == current[:size]:
+                return size
+        return 0
+
+    @staticmethod
+    def _cap(transcript: Transcript, budget_chars: int) -> Transcript:
+        """
+        Fit the transcript into budget_chars by splitting it into equal-time
+        sections and keeping the opening segments of each, so the whole
+        video stays represented rather than only its beginning.
+        """
+        capped = Transcript(language=transcript.language, chapters=transcript.chapters)
+        section_budget = budget_chars // BUDGET_SECTIONS
+        section_length = (transcript.end or 1.0) / BUDGET_SECTIONS
+        section, used = -1, 0
+
+        for start, duration, text in transcript:
+            current = min(BUDGET_SECTIONS - 1, int(start // section_length))
+            if current != section:
+                section, used = current, 0
+            if used + len(text) + 1 > section_budget:
+                continue
+            capped.append(start, duration, text)
+            used += len(text) + 1
+
+        logger.info(f"Transcript capped from {transcript.char_count} to {capped.char_count} chars")
+        return capped
+
+
+_transcript_normalizer: Optional[TranscriptNormalizer] = None
+
+
+def get_transcript_normalizer() -> TranscriptNormalizer:
+    """
+    Return the process-wide transcript normalizer.
+    Configured by TRANSCRIPT_STRIP_MARKERS, TRANSCRIPT_STRIP_FILLERS,
+    TRANSCRIPT_DEDUPE and TRANSCRIPT_TOKEN_BUDGET (0 = no cap).
+    """
+    global _transcript_normalizer
+    if _transcript_normalizer is None:
+        _transcript_normalizer = TranscriptNormalizer(
+            strip_markers=os.getenv("TRANSCRIPT_STRIP_MARKERS", "True").lower() == "true",
+            strip_fillers=os.getenv("TRANSCRIPT_STRIP_FILLERS", "True").lower() == "true",
+            dedupe=os.getenv("TRANSCRIPT_DEDUPE", "True").lower() == "true",
+            token_budget=int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", 0))
+        )
+    return _transcript_normalizer
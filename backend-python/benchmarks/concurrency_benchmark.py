@@ -0,0 +1,66 @@
+"""
+Concurrency benchmark for POST /api/v1/summarize.
+
+Replaces YouTubeTranscriptApi, yt-dlp and the Gemini model with the fakes
+in fakes.py (fixed latency, no errors), then fires batches of concurrent requests at the
+FastAPI app in-process. With the event loop unblocked, throughput should grow
+with concurrency (up to YOUTUBE_WORKERS) instead of staying at ~1 request at a time.
+
+Usage (from backend-python/):
+    python benchmarks/concurrency_benchmark.py --levels 1 4 8 16 --requests 32
+
+For latency percentiles, error injection and memory use see load_test.py.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+# Keep the client-side Gemini throttle out of the measurement
+os.environ.setdefault("GEMINI_RPM", "1000000")
+
+from fakes import patched_backends  # noqa: E402
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, total: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            response = await client.post("/api/v1/summarize", json={
+                # Unique per level so the summary cache never short-circuits the run
+                "video_url": f"https://www.youtube.com/watch?v=c{concurrency:03d}i{i:05d}",
+                "summary_type": "brief"
+            })
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start
+
+
+async def main(levels, total):
+    with patched_backends():
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            print(f"{'concurrency':>12} {'requests':>9} {'elapsed_s':>10} {'req/s':>8}")
+            for level in levels:
+                elapsed = await run_level(client, level, total)
+                print(f"{level:>12} {total:>9} {elapsed:>10.2f} {total / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.levels, args.requests))
@@ -0,0 +1,177 @@
+"""
+Local stand-ins for YouTube and Gemini used by the benchmarks.
+
+The fakes replace YouTubeTranscriptApi, yt_dlp.YoutubeDL and
+google.generativeai.GenerativeModel. Latency, jitter, error rates and
+transcript size are read from the module-level CONFIG so a harness can
+tune them per run:
+
+    from fakes import CONFIG, patched_backends
+    CONFIG.gemini_latency = 0.5
+    with patched_backends():
+        from main import app
+        ...
+"""
+import asyncio
+import contextlib
+import json
+import random
+import time
+from unittest import mock
+
+
+class FakeBackendConfig:
+    """Latency (seconds), jitter (fraction of latency) and error rates (0..1) for the fakes"""
+
+    def __init__(self):
+        self.transcript_latency = 0.2
+        self.metadata_latency = 0.2
+        self.gemini_latency = 0.3
+        self.jitter = 0.0
+        self.transcript_error_rate = 0.0
+        self.metadata_error_rate = 0.0
+        self.gemini_error_rate = 0.0
+        # Per-model 429 rates, overriding gemini_error_rate for those models
+        self.gemini_model_error_rates = {}
+        # Extra latency per model, added to gemini_latency
+        self.gemini_model_latency = {}
+        self.segment_count = 200
+        self.segment_text = "benchmark transcript line"
+        self.summary_text = "Benchmark summary."
+        self.seed = None
+        # Calls made to each fake, for benchmarks that count upstream work
+        self.calls = {"transcript": 0, "metadata": 0, "gemini": 0}
+        self.model_calls = {}
+        # Characters sent to Gemini, for benchmarks that compare prompt sizes
+        self.prompt_chars = 0
+
+    def latency(self, base: float) -> float:
+        if not self.jitter:
+            return base
+        return max(0.0, random.uniform(base * (1 - self.jitter), base * (1 + self.jitter)))
+
+    @staticmethod
+    def fails(rate: float) -> bool:
+        return rate > 0 and random.random() < rate
+
+
+CONFIG = FakeBackendConfig()
+
+
+class FakeTranscript:
+    language_code = "en"
+
+    def fetch(self):
+        CONFIG.calls["transcript"] += 1
+        time.sleep(CONFIG.latency(CONFIG.transcript_latency))
+        if CONFIG.fails(CONFIG.transcript_error_rate):
+            raise RuntimeError("Fake transcript fetch failed")
+        return [
+            {"text": CONFIG.segment_text, "start": i * 2.0, "duration": 2.0}
+            for i in range(CONFIG.segment_count)
+        ]
+
+
+class FakeTranscriptList:
+    def find_manually_created_transcript(self, languages):
+        return FakeTranscript()
+
+
+def fake_list_transcripts(*args, **kwargs):
+    return FakeTranscriptList()
+
+
+def fake_get_transcript(*args, **kwargs):
+    raise RuntimeError("Fake get_transcript unavailable")
+
+
+class FakeYoutubeDL:
+    def __init__(self, opts=None):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def extract_info(self, url, download=False):
+        CONFIG.calls["metadata"] += 1
+        time.sleep(CONFIG.latency(CONFIG.metadata_latency))
+        if CONFIG.fails(CONFIG.metadata_error_rate):
+            raise RuntimeError("Fake yt-dlp extraction failed")
+        return {
+            "title": "Benchmark Video",
+            "duration": int(CONFIG.segment_count * 2),
+            "thumbnail": "https://example.com/thumb.jpg"
+        }
+
+
+class FakeUsage:
+    def __init__(self, prompt: str, response: str):
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(response) // 4
+
+
+class FakePart:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeResponse:
+    def __init__(self, text: str = None, prompt: str = ""):
+        self.text = CONFIG.summary_text if text is None else text
+        self.parts = [FakePart(self.text)]
+        self.usage_metadata = FakeUsage(prompt, self.text)
+
+
+class FakeStreamResponse:
+    def __init__(self, prompt: str, chunks: int = 4):
+        self.prompt = prompt
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        latency = CONFIG.latency(CONFIG.gemini_latency)
+        for _ in range(self.chunks):
+            await asyncio.sleep(latency / self.chunks)
+            yield FakeResponse(prompt=self.prompt)
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None, **kwargs):
+        CONFIG.calls["gemini"] += 1
+        CONFIG.model_calls[self.model_name] = CONFIG.model_calls.get(self.model_name, 0) + 1
+        CONFIG.prompt_chars += len(prompt)
+        latency = CONFIG.gemini_latency + CONFIG.gemini_model_latency.get(self.model_name, 0.0)
+        if CONFIG.fails(CONFIG.gemini_model_error_rates.get(self.model_name, CONFIG.gemini_error_rate)):
+            await asyncio.sleep(CONFIG.latency(latency) / 10)
+            raise RuntimeError("429 Resource has been exhausted (fake)")
+        if stream:
+            return FakeStreamResponse(prompt)
+        await asyncio.sleep(CONFIG.latency(latency))
+        if (generation_config or {}).get("response_mime_type") == "application/json":
+            # Structured multi-format reply: one value per format key named in the prompt
+            formats = [key for key in ("detailed", "brief", "bullet_points") if f'"{key}":' in prompt]
+            return FakeResponse(json.dumps({key: CONFIG.summary_text for key in formats}), prompt)
+        return FakeResponse(prompt=prompt)
+
+
+@contextlib.contextmanager
+def patched_backends():
+    """Route every YouTube and Gemini call made by the app to the fakes"""
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    if CONFIG.seed is not None:
+        random.seed(CONFIG.seed)
+
+    with mock.patch.object(YouTubeTranscriptApi, "list_transcripts", fake_list_transcripts), \
+         mock.patch.object(YouTubeTranscriptApi, "get_transcript", fake_get_transcript), \
+         mock.patch("yt_dlp.YoutubeDL", FakeYoutubeDL), \
+         mock.patch("google.generativeai.GenerativeModel", FakeGenerativeModel):
+        yield CONFIG
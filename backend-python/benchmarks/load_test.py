@@ -0,0 +1,194 @@
+"""
+Offline load test for the summarize API.
+
+Drives the FastAPI app in main.py in-process with YouTube and Gemini
+replaced by the configurable fakes in fakes.py, and reports per
+concurrency level: p50/p95/p99 latency, requests per second, error
+counts by status, and memory per in-flight request (tracemalloc peak
+divided by concurrency). Use --output to save a JSON baseline and
+--compare to diff a run against one.
+
+Usage (from backend-python/):
+    python benchmarks/load_test.py --levels 1 8 32 --requests 64
+    python benchmarks/load_test.py --gemini-latency 1.0 --gemini-error-rate 0.05 --jitter 0.3
+    python benchmarks/load_test.py --hot-ratio 0.5 --output baseline.json
+    python benchmarks/load_test.py --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+# Keep the client-side Gemini throttle out of the measurement unless asked for
+os.environ.setdefault("GEMINI_RPM", "1000000")
+
+from fakes import CONFIG, patched_backends  # noqa: E402
+
+HOT_VIDEOS = 4
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def video_url(run_id: str, level: int, i: int, hot_ratio: float) -> str:
+    if hot_ratio and random.random() < hot_ratio:
+        # Shared ids exercise the summary cache and request coalescing
+        return f"https://www.youtube.com/watch?v=hot{run_id}{random.randrange(HOT_VIDEOS):04d}"
+    return f"https://www.youtube.com/watch?v=c{run_id}{level:03d}i{i:05d}"
+
+
+async def run_level(client: httpx.AsyncClient, args, level: int, run_id: str) -> Dict:
+    semaphore = asyncio.Semaphore(level)
+    latencies = []
+    statuses = Counter()
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/v1/summarize", json={
+                    "video_url": video_url(run_id, level, i, args.hot_ratio),
+                    "summary_type": args.summary_type
+                })
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    if args.memory:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    memory_per_request = None
+    if args.memory:
+        _, peak = tracemalloc.get_traced_memory()
+        memory_per_request = max(0, peak - baseline) / min(level, args.requests) / 1024
+
+    return {
+        "concurrency": level,
+        "requests": args.requests,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(args.requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "ok": statuses.get(200, 0),
+        "errors": {str(k): v for k, v in statuses.items() if k != 200},
+        "kib_per_request": round(memory_per_request, 1) if memory_per_request is not None else None
+    }
+
+
+def print_table(results: List[Dict], baseline: Dict = None):
+    header = f"{'conc':>5} {'reqs':>5} {'req/s':>8} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'KiB/req':>8}  errors"
+    print(header)
+    for row in results:
+        memory = f"{row['kib_per_request']:>8.1f}" if row["kib_per_request"] is not None else f"{'-':>8}"
+        errors = ", ".join(f"{k}={v}" for k, v in row["errors"].items()) or "-"
+        print(
+            f"{row['concurrency']:>5} {row['requests']:>5} {row['rps']:>8.2f} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {memory}  {errors}"
+        )
+        previous = (baseline or {}).get(str(row["concurrency"]))
+        if previous:
+            print(
+                f"{'':>5} {'vs':>5} {_delta(row['rps'], previous['rps']):>8} {_delta(row['p50_ms'], previous['p50_ms']):>8} "
+                f"{_delta(row['p95_ms'], previous['p95_ms']):>8} {_delta(row['p99_ms'], previous['p99_ms']):>8}"
+            )
+
+
+def _delta(current: float, previous: float) -> str:
+    if not previous:
+        return "-"
+    return f"{(current - previous) / previous * 100:+.0f}%"
+
+
+def configure_fakes(args):
+    CONFIG.transcript_latency = args.youtube_latency
+    CONFIG.metadata_latency = args.youtube_latency
+    CONFIG.gemini_latency = args.gemini_latency
+    CONFIG.jitter = args.jitter
+    CONFIG.transcript_error_rate = args.transcript_error_rate
+    CONFIG.metadata_error_rate = args.metadata_error_rate
+    CONFIG.gemini_error_rate = args.gemini_error_rate
+    CONFIG.segment_count = args.segments
+    CONFIG.seed = args.seed
+
+
+async def main(args):
+    configure_fakes(args)
+    random.seed(args.seed)
+
+    if args.memory:
+        tracemalloc.start()
+
+    with patched_backends():
+        from main import app
+        # Per-request INFO logs would dominate both the output and the timings
+        logging.getLogger().setLevel(args.log_level)
+
+        # Unique per run so a persistent cache backend never short-circuits it
+        run_id = f"{int(time.time()) % 100000:05d}"
+        results = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            # Build the lazy singletons (clients, caches, executor) before measuring
+            await client.post("/api/v1/summarize", json={"video_url": video_url(run_id, 0, 0, 0.0)})
+            for level in args.levels:
+                results.append(await run_level(client, args, level, run_id))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {str(row["concurrency"]): row for row in json.load(f)["results"]}
+
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(CONFIG), "results": results}, f, indent=2)
+        print(f"\nBaseline written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--summary-type", default="brief", choices=["brief", "detailed", "bullet_points"])
+    parser.add_argument("--hot-ratio", type=float, default=0.0, help="fraction of requests for a few shared videos")
+    parser.add_argument("--youtube-latency", type=float, default=0.2, help="seconds per transcript/metadata call")
+    parser.add_argument("--gemini-latency", type=float, default=0.3, help="seconds per model call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latency jitter as a fraction (0.3 = +/-30%%)")
+    parser.add_argument("--transcript-error-rate", type=float, default=0.0)
+    parser.add_argument("--metadata-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="fraction of model calls failing with 429")
+    parser.add_argument("--segments", type=int, default=200, help="transcript segments per video")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip tracemalloc (lower overhead)")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON baseline from a previous --output run")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""
+Multi-format benchmark: Gemini work for detailed, brief and bullet_points
+summaries of the same video.
+
+Runs the summarize API in-process with the fakes from fakes.py and, for
+each strategy, asks for all three formats of --videos videos:
+
+- separate: one request per format, each prompting with the full transcript
+- derived: one request per format; brief and bullet_points are condensed
+  from the cached detailed summary
+- combined: one request listing all three formats (one structured call)
+
+It reports Gemini calls, prompt characters sent and wall time. The fake
+summary is short, so derived prompts here are close to their floor; with
+real summaries they grow with the detailed text but stay far below a
+transcript.
+
+Usage (from backend-python/):
+    python benchmarks/multi_format_benchmark.py --videos 4 --segments 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+os.environ.setdefault("GEMINI_RPM", "1000000")
+os.environ.setdefault("GEMINI_TPM", "1000000000")
+os.environ.setdefault("SUMMARY_CACHE_BACKEND", "memory")
+os.environ.setdefault("TRANSCRIPT_STORE_DIR", tempfile.mkdtemp(prefix="summtube-multi-format-"))
+
+import httpx  # noqa: E402
+from fakes import CONFIG, patched_backends  # noqa: E402
+
+FORMATS = ["detailed", "brief", "bullet_points"]
+STRATEGIES = [
+    ("separate", dict(derive_formats=False, multi_format=False)),
+    ("derived", dict(derive_formats=True, multi_format=False)),
+    ("combined", dict(derive_formats=True, multi_format=True)),
+]
+
+
+async def run_strategy(client, summary_service, name, options, videos):
+    for attribute, value in options.items():
+        setattr(summary_service, attribute, value)
+    calls, chars = CONFIG.calls["gemini"], CONFIG.prompt_chars
+    start = time.perf_counter()
+
+    for i in range(videos):
+        url = f"https://www.youtube.com/watch?v=mf{name[:3]}{i:04d}"
+        if name == "combined":
+            response = await client.post("/api/v1/summarize", json={"video_url": url, "summary_type": FORMATS})
+            response.raise_for_status()
+        else:
+            for summary_type in FORMATS:
+                response = await client.post("/api/v1/summarize", json={"video_url": url, "summary_type": summary_type})
+                response.raise_for_status()
+
+    elapsed = time.perf_counter() - start
+    return CONFIG.calls["gemini"] - calls, CONFIG.prompt_chars - chars, elapsed
+
+
+async def main(args):
+    CONFIG.segment_count = args.segments
+    CONFIG.gemini_latency = args.gemini_latency
+    CONFIG.transcript_latency = CONFIG.metadata_latency = 0.0
+
+    with patched_backends():
+        from main import app
+        from app.services.summary_service import get_summary_service
+        logging.getLogger().setLevel("WARNING")
+        summary_service = get_summary_service()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            print(f"{'strategy':>10} {'calls':>6} {'prompt_chars':>13} {'chars/video':>12} {'seconds':>8}")
+            for name, options in STRATEGIES:
+                calls, chars, elapsed = await run_strategy(client, summary_service, name, options, args.videos)
+                print(f"{name:>10} {calls:>6} {chars:>13} {chars // args.videos:>12} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=4)
+    parser.add_argument("--segments", type=int, default=2000, help="transcript segments per fake video")
+    parser.add_argument("--gemini-latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args))
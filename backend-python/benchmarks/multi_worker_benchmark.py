@@ -0,0 +1,108 @@
+"""
+Multi-worker benchmark: duplicate upstream work across worker processes.
+
+Starts --workers processes, each running the FastAPI app in-process with
+the fakes from fakes.py, and has all of them request the same few hot
+videos at once, the way a load balancer spreads identical requests over
+uvicorn workers. It reports throughput and how many transcript, metadata
+and Gemini calls were made in total, with the local (per-process) state
+and with the SQLite shared state. With shared state each video should
+be fetched and summarized once however many workers ask for it.
+
+Usage (from backend-python/):
+    python benchmarks/multi_worker_benchmark.py --workers 4 --videos 4 --requests 16
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+
+def worker(backend: str, data_dir: str, run_id: str, args, start_at: float, results):
+    os.environ.update({
+        "GOOGLE_API_KEY": "benchmark-key",
+        "GEMINI_RPM": "1000000",
+        "WEB_CONCURRENCY": str(args.workers),
+        "SHARED_STATE_BACKEND": backend,
+        "SHARED_STATE_PATH": os.path.join(data_dir, "shared_state.db"),
+        "SUMMARY_CACHE_BACKEND": "sqlite" if backend == "sqlite" else "memory",
+        "SUMMARY_CACHE_PATH": os.path.join(data_dir, "summary_cache.db"),
+        "TRANSCRIPT_STORE_DIR": os.path.join(data_dir, "transcripts"),
+        "SUMMARY_LOCK_POLL": "0.05"
+    })
+    import httpx
+    from fakes import CONFIG, patched_backends
+
+    async def run():
+        with patched_backends():
+            from main import app
+            logging.getLogger().setLevel("WARNING")
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+                await asyncio.sleep(max(0.0, start_at - time.time()))
+                responses = await asyncio.gather(*(
+                    client.post("/api/v1/summarize", json={
+                        "video_url": f"https://www.youtube.com/watch?v=mw{run_id}{i % args.videos:03d}",
+                        "summary_type": "brief"
+                    })
+                    for i in range(args.requests)
+                ))
+        return sum(1 for r in responses if r.status_code == 200)
+
+    ok = asyncio.run(run())
+    results.put((ok, dict(CONFIG.calls)))
+
+
+def run_backend(backend: str, args) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    with tempfile.TemporaryDirectory() as data_dir:
+        run_id = f"{int(time.time() * 1000) % 100000:05d}"
+        # Give every process time to import the app so requests start together
+        start_at = time.time() + args.startup
+        processes = [
+            ctx.Process(target=worker, args=(backend, data_dir, run_id, args, start_at, results))
+            for _ in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        elapsed = time.time() - start_at
+        for process in processes:
+            process.join()
+
+    calls = {"transcript": 0, "metadata": 0, "gemini": 0}
+    for _, worker_calls in collected:
+        for name, count in worker_calls.items():
+            calls[name] += count
+    ok = sum(count for count, _ in collected)
+    return {"backend": backend, "ok": ok, "elapsed": elapsed, **calls}
+
+
+def main(args):
+    total = args.workers * args.requests
+    print(f"{args.workers} workers x {args.requests} requests over {args.videos} videos ({total} requests)")
+    print(f"{'state':>8} {'ok':>5} {'elapsed_s':>10} {'req/s':>8} {'transcript':>11} {'metadata':>9} {'gemini':>7}")
+    for backend in ("local", "sqlite"):
+        row = run_backend(backend, args)
+        print(
+            f"{row['backend']:>8} {row['ok']:>5} {row['elapsed']:>10.2f} {total / row['elapsed']:>8.2f} "
+            f"{row['transcript']:>11} {row['metadata']:>9} {row['gemini']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--videos", type=int, default=4, help="distinct videos requested")
+    parser.add_argument("--requests", type=int, default=16, help="requests per worker")
+    parser.add_argument("--startup", type=float, default=5.0, help="seconds allowed for workers to start")
+    main(parser.parse_args())
@@ -0,0 +1,89 @@
+"""
+Benchmark for transcript normalization before prompting.
+
+Generates synthetic auto-generated captions of the given lengths, with
+rolling lines that repeat the tail of the previous line, [Music] and
+[Applause] markers, fillers and messy whitespace. For each normalizer
+configuration it reports the estimated prompt tokens before and after
+and the time taken.
+
+Usage (from backend-python/):
+    python benchmarks/normalize_benchmark.py --hours 0.5 1 3
+    python benchmarks/normalize_benchmark.py --hours 3 --budget 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.transcript import Transcript  # noqa: E402
+from app.utils.transcript_normalizer import TranscriptNormalizer  # noqa: E402
+
+WORDS = (
+    "so the idea here is that we want to keep the cache warm while the request is in flight "
+    "because every miss goes back to the origin and that is where most of our latency comes from"
+).split()
+FILLERS = ["um", "uh", "uh,", "hmm"]
+MARKERS = ["[Music]", "[Applause]", "[Laughter]"]
+SEGMENT_SECONDS = 2.0
+# Auto-captions stay on screen until the line after next starts
+ROLLING_DURATION = 2 * SEGMENT_SECONDS
+
+
+def rolling_captions(hours: float, seed: int = 1) -> Transcript:
+    """YouTube-style auto captions: each line restates the last words of the previous one and overlaps it in time"""
+    rng = random.Random(seed)
+    transcript = Transcript(language="en")
+    previous = []
+    for i in range(int(hours * 3600 / SEGMENT_SECONDS)):
+        if rng.random() < 0.05:
+            transcript.append(i * SEGMENT_SECONDS, SEGMENT_SECONDS, rng.choice(MARKERS))
+            previous = []
+            continue
+        new_words = [rng.choice(WORDS) for _ in range(rng.randint(3, 6))]
+        if rng.random() < 0.2:
+            new_words.insert(rng.randrange(len(new_words)), rng.choice(FILLERS))
+        line = previous[-rng.randint(2, 4):] + new_words if previous else new_words
+        transcript.append(i * SEGMENT_SECONDS, ROLLING_DURATION, "  ".join(line) if rng.random() < 0.1 else " ".join(line))
+        previous = line
+    return transcript
+
+
+CONFIGURATIONS = [
+    ("markers", dict(strip_markers=True, strip_fillers=False, dedupe=False)),
+    ("markers+fillers", dict(strip_markers=True, strip_fillers=True, dedupe=False)),
+    ("all", dict(strip_markers=True, strip_fillers=True, dedupe=True)),
+]
+
+
+def main(hours_list, budget, repeat):
+    configurations = list(CONFIGURATIONS)
+    if budget:
+        configurations.append((f"all+budget{budget}", dict(strip_markers=True, strip_fillers=True, dedupe=True, token_budget=budget)))
+
+    print(f"{'hours':>6} {'config':>20} {'tokens_in':>10} {'tokens_out':>11} {'saved':>6} {'ms':>8}")
+    for hours in hours_list:
+        transcript = rolling_captions(hours)
+        for name, options in configurations:
+            normalizer = TranscriptNormalizer(**options)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                _, estimate = normalizer.normalize(transcript)
+            elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+            saved = 1 - estimate["normalized"] / estimate["original"]
+            print(
+                f"{hours:>6} {name:>20} {estimate['original']:>10} {estimate['normalized']:>11} "
+                f"{saved:>6.0%} {elapsed_ms:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, nargs="+", default=[0.5, 1, 3])
+    parser.add_argument("--budget", type=int, default=0, help="also run with this TRANSCRIPT_TOKEN_BUDGET")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.hours, args.budget, args.repeat)
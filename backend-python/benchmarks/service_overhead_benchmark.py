@@ -0,0 +1,109 @@
+"""
+Micro-benchmark of per-request setup overhead: rebuilding clients on every
+request (the old behaviour) versus the application-lifespan singletons.
+
+Everything runs offline: Gemini clients are only constructed (never called),
+and the HTTP comparison talks to a local keep-alive server.
+
+Usage (from backend-python/):
+    python benchmarks/service_overhead_benchmark.py --iterations 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+import yt_dlp
+import google.generativeai as genai
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+os.environ.setdefault("YOUTUBE_COOKIES", "# Netscape HTTP Cookie File\n.youtube.com\tTRUE\t/\tTRUE\t0\tPREF\tf6=40000000\n")
+
+from app.services.ai_service import AIService, get_model_name
+from app.services.youtube_service import YouTubeService
+from app.utils.cookies import CookieFile
+from app.utils.http_client import create_session
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"events": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(fn, iterations: int) -> float:
+    """Mean microseconds per call"""
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(iterations: int):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/subs.json3"
+
+    youtube_service = YouTubeService()
+    ai_service = AIService()
+    cookie_file = CookieFile()
+    session = create_session()
+
+    def rebuild_ai():
+        genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+        genai.GenerativeModel(get_model_name())
+
+    def rebuild_ydl():
+        with yt_dlp.YoutubeDL({'quiet': True, 'skip_download': True}):
+            pass
+
+    def rebuild_cookie_file():
+        fd, path = tempfile.mkstemp(suffix=".txt", text=True)
+        with os.fdopen(fd, 'w') as f:
+            f.write(os.environ["YOUTUBE_COOKIES"])
+        os.unlink(path)
+
+    rows = [
+        ("Gemini client", rebuild_ai, lambda: ai_service.model),
+        ("yt-dlp instance", rebuild_ydl, lambda: youtube_service._get_ydl(None)),
+        ("cookie file", rebuild_cookie_file, cookie_file.path),
+        ("subtitle HTTP GET", lambda: requests.get(url, timeout=5).json(), lambda: session.get(url, timeout=5).json()),
+    ]
+
+    print(f"{'component':<20} {'per-request us':>15} {'singleton us':>13} {'saved us':>10}")
+    total_saved = 0.0
+    for name, rebuild, reuse in rows:
+        before = timed(rebuild, iterations)
+        after = timed(reuse, iterations)
+        total_saved += before - after
+        print(f"{name:<20} {before:>15.1f} {after:>13.1f} {before - after:>10.1f}")
+    print(f"{'total':<20} {'':>15} {'':>13} {total_saved:>10.1f}")
+
+    cookie_file.remove()
+    session.close()
+    youtube_service.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    main(args.iterations)
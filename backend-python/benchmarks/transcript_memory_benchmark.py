@@ -0,0 +1,84 @@
+"""
+Memory and chunking benchmark for the Transcript model.
+
+Builds synthetic auto-caption transcripts for videos of the given lengths
+and compares the previous representation (a list of segment dicts plus
+the joined transcript string) with Transcript (float arrays + interned
+text). Auto-captions repeat a lot of short lines ("[Music]", rolling
+fragments), which interning stores once. Also times chunk_by_chars,
+which renders chunks straight from segment ranges.
+
+Usage (from backend-python/):
+    python benchmarks/transcript_memory_benchmark.py --hours 1 3 6
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.transcript import Transcript  # noqa: E402
+
+WORDS = (
+    "the so we can see that this is going to be really important when you look at how "
+    "data model works and then what happens next is pretty interesting because"
+).split()
+REPEATED = ["[Music]", "[Applause]", "okay", "so", "yeah", "right"]
+SEGMENT_SECONDS = 2.5
+
+
+def synthetic_segments(hours: float, seed: int = 1):
+    rng = random.Random(seed)
+    segments = []
+    for i in range(int(hours * 3600 / SEGMENT_SECONDS)):
+        if rng.random() < 0.15:
+            text = rng.choice(REPEATED)
+        else:
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 9)))
+        segments.append({"text": text, "start": i * SEGMENT_SECONDS, "duration": SEGMENT_SECONDS})
+    return segments
+
+
+def dicts_size(segments, joined) -> int:
+    return sys.getsizeof(segments) + sys.getsizeof(joined) + sum(
+        sys.getsizeof(seg) + sys.getsizeof(seg["text"]) + sys.getsizeof(seg["start"]) + sys.getsizeof(seg["duration"])
+        for seg in segments
+    )
+
+
+def main(hours_list):
+    print(f"{'hours':>6} {'segments':>9} {'dicts_MiB':>10} {'model_MiB':>10} {'saving':>7} {'chunk_ms':>9}")
+    for hours in hours_list:
+        # Caption text arrives as bytes; each side decodes its own fresh strings like a JSON parser would
+        source = [(s["text"].encode("utf-8"), s["start"], s["duration"]) for s in synthetic_segments(hours)]
+
+        def build_dicts():
+            segments = [{"text": text.decode("utf-8"), "start": start, "duration": duration} for text, start, duration in source]
+            return segments, " ".join(seg["text"] for seg in segments)
+
+        def build_model():
+            transcript = Transcript()
+            for text, start, duration in source:
+                transcript.append(start, duration, text.decode("utf-8"))
+            return transcript
+
+        dict_bytes = dicts_size(*build_dicts())
+        transcript = build_model()
+        model_bytes = transcript.memory_bytes() + sys.getsizeof(transcript.text)
+
+        start = time.perf_counter()
+        transcript.chunk_by_chars(8000 * 4)
+        chunk_ms = (time.perf_counter() - start) * 1000
+
+        print(
+            f"{hours:>6} {len(transcript):>9} {dict_bytes / 2**20:>10.2f} {model_bytes / 2**20:>10.2f} "
+            f"{1 - model_bytes / dict_bytes:>7.0%} {chunk_ms:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 3, 6])
+    main(parser.parse_args().hours)
@@ -0,0 +1,2 @@
+# Benchmarks are scripts (load_test.py would otherwise be collected as a test module)
+collect_ignore = ["benchmarks", "venv"]
@@ -1,7 +1,18 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.summary import router as summary_router
+from app.routes.metrics import router as metrics_router
+from app.utils.metrics import HTTP_DURATION, HTTP_IN_FLIGHT
 from app.utils.logger import setup_logging
+from app.utils.concurrency import get_executor, shutdown_executor
+from app.utils.shared_state import get_shared_state, get_worker_count
+from app.services.cache_service import get_summary_cache
+from app.services.batch_service import get_batch_manager
+from app.services.summary_service import get_summary_service
+from app.services.ai_service import get_ai_service
+from app.services.youtube_service import get_youtube_service
 from dotenv import load_dotenv  # ADD THIS
 import uvicorn
 import os
@@ -12,11 +23,27 @@ load_dotenv()  # ADD THIS
 # Setup logging
 setup_logging()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the long-lived clients once; routes receive them via Depends
+    get_executor()
+    get_summary_service()
+    if os.getenv("GOOGLE_API_KEY"):
+        get_ai_service()
+    get_batch_manager().start()
+    yield
+    await get_batch_manager().stop()
+    get_summary_cache().close()
+    get_youtube_service().close()
+    get_shared_state().close()
+    shutdown_executor()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="SummTube AI Service",
     description="YouTube Video Summarization API with AI",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - use env variable
@@ -31,6 +58,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    # Unlabelled: the route template is only known once the request has been routed
+    HTTP_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        # Label by route template so /summarize/batch/{job_id} stays one series
+        route = request.scope.get("route")
+        HTTP_DURATION.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            path=getattr(route, "path", "unmatched"),
+            status=str(status)
+        )
+
 # Health check endpoints
 @app.get("/")
 async def root():
@@ -40,7 +88,11 @@ async def root():
         "version": "2.0.0",
         "endpoints": {
             "health": "/api/v1/health",
-            "summarize": "/api/v1/summarize"
+            "summarize": "/api/v1/summarize",
+            "summarize_stream": "/api/v1/summarize/stream",
+            "summarize_batch": "/api/v1/summarize/batch",
+            "stats": "/api/v1/stats",
+            "metrics": "/metrics"
         }
     }
 
@@ -54,10 +106,14 @@ async def health_check():
 
 # Include routers
 app.include_router(summary_router, prefix="/api/v1", tags=["summarization"])
+app.include_router(metrics_router, tags=["monitoring"])
 
 if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8001))
     debug = os.getenv("DEBUG", "False").lower() == "true"
+    # Worker processes share caches, locks and Gemini quota via SHARED_STATE_BACKEND;
+    # reload mode only supports a single process
+    workers = 1 if debug else get_worker_count()
     
-    uvicorn.run("main:app", host=host, port=port, reload=debug)
\ No newline at end of file
+    uvicorn.run("main:app", host=host, port=port, reload=debug, workers=workers)
\ No newline at end of file
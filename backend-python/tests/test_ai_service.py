@@ -0,0 +1,181 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services import ai_service
+from app.services.ai_service import AIService
+from app.utils.rate_limiter import RateLimiter
+from app.utils.transcript import Transcript
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+
+class FakePart:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStreamChunk:
+    """Like a streamed GenerateContentResponse: .text raises ValueError without parts"""
+
+    def __init__(self, text: str = "", usage=None):
+        self.parts = [FakePart(text)] if text else []
+        self.usage_metadata = usage
+
+    @property
+    def text(self):
+        if not self.parts:
+            raise ValueError("Invalid operation: The `response.text` quick accessor requires a valid `Part`")
+        return self.parts[0].text
+
+
+class FakeUsage:
+    prompt_token_count = 40
+    candidates_token_count = 6
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel; replies with whatever reply(prompt) returns"""
+
+    calls = 0
+    reply = staticmethod(lambda prompt: "summary")
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt, stream=False, generation_config=None, **kwargs):
+        FakeModel.calls += 1
+        if stream:
+            # Text chunks, then a final chunk carrying only the usage metadata
+            return FakeStream([FakeStreamChunk("Hello "), FakeStreamChunk("world"), FakeStreamChunk(usage=FakeUsage())])
+        return FakeResponse(FakeModel.reply(prompt))
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(ai_service.genai, "GenerativeModel", FakeModel)
+    limiters = {}
+    monkeypatch.setattr(
+        ai_service, "get_rate_limiter", lambda model: limiters.setdefault(model, RateLimiter(1000000, 1000000000))
+    )
+    monkeypatch.setattr(FakeModel, "calls", 0)
+    return AIService()
+
+
+def long_transcript(segments: int) -> Transcript:
+    transcript = Transcript(language="en")
+    for i in range(segments):
+        transcript.append(i * 2.0, 2.0, f"sentence number {i} of a long talk")
+    return transcript
+
+
+def map_levels(prompts) -> int:
+    """Each map level sends exactly one "Part 1 of N" prompt"""
+    return sum(prompt.startswith("Part 1 of") for prompt in prompts)
+
+
+def test_map_stage_stops_when_summaries_do_not_shrink(service, monkeypatch):
+    service.chunk_size_tokens = 100
+    service.chunk_threshold = 3000
+    prompts = []
+
+    def same_size(prompt):
+        prompts.append(prompt)
+        return "x" * 600
+
+    monkeypatch.setattr(FakeModel, "reply", staticmethod(same_size))
+    result = asyncio.run(asyncio.wait_for(service.generate_summary(long_transcript(400)), 10))
+
+    assert result["text"] == "x" * 600
+    # The second level grew the text, so the reduce step ran on the (truncated) first level
+    assert map_levels(prompts) == 2
+    assert len(prompts[-1]) < service.chunk_threshold + 1000
+
+
+def test_map_stage_is_capped_at_max_levels(service, monkeypatch):
+    service.chunk_size_tokens = 100
+    service.chunk_threshold = 3000
+    service.chunk_max_levels = 2
+    prompts = []
+
+    def shrink_slowly(prompt):
+        prompts.append(prompt)
+        chunk = prompt.split("Transcript:\n", 1)[1]
+        return "y " * int(len(chunk) * 0.45)
+
+    monkeypatch.setattr(FakeModel, "reply", staticmethod(shrink_slowly))
+    combined, chunk_count = asyncio.run(
+        service._map_chunks(long_transcript(400), "title", "detailed", service.router.route(0, "detailed"))
+    )
+
+    assert map_levels(prompts) == 2
+    assert len(combined) == service.chunk_threshold
+
+
+def test_stream_tolerates_chunks_without_parts(service):
+    async def run():
+        return [event async for event in service.stream_summary(long_transcript(3), "brief")]
+
+    events = asyncio.run(run())
+
+    assert [event["event"] for event in events] == ["token", "token", "summary_complete"]
+    complete = events[-1]["data"]
+    assert complete["text"] == "Hello world"
+    usage = complete["routing"]["models"][service.router.route(0, "brief").model]
+    assert usage["prompt_tokens"] == 40
+    assert usage["response_tokens"] == 6
+
+
+def test_parse_formats_with_all_sections():
+    reply = json.dumps({"detailed": "Long text.", "brief": "Short.", "bullet_points": "- one\n- two"})
+
+    assert AIService._parse_formats(reply, ["detailed", "brief", "bullet_points"]) == {
+        "detailed": "Long text.", "brief": "Short.", "bullet_points": "- one\n- two"
+    }
+
+
+def test_parse_formats_tolerates_order_whitespace_and_fences():
+    reply = '```json\n{\n  " Bullet_Points ": "  - one  ",\n\n  "brief":"Short. ",  "detailed" : "Long."\n}\n```'
+
+    assert AIService._parse_formats(reply, ["detailed", "brief", "bullet_points"]) == {
+        "detailed": "Long.", "brief": "Short.", "bullet_points": "- one"
+    }
+
+
+def test_parse_formats_leaves_out_missing_empty_and_unparseable_sections():
+    reply = json.dumps({"detailed": "Long.", "brief": "   ", "bullet_points": ["- not a string"]})
+
+    assert AIService._parse_formats(reply, ["detailed", "brief", "bullet_points"]) == {"detailed": "Long."}
+    assert AIService._parse_formats("not json at all", ["detailed"]) == {}
+
+
+def test_generate_summaries_regenerates_only_the_missing_format(service, monkeypatch):
+    prompts = []
+
+    def reply(prompt):
+        prompts.append(prompt)
+        if "Reply with a JSON object" in prompt:
+            return json.dumps({"bullet_points": "- one", "detailed": "Long."})
+        return "Short on its own."
+
+    monkeypatch.setattr(FakeModel, "reply", staticmethod(reply))
+    result = asyncio.run(service.generate_summaries(long_transcript(3), ["detailed", "brief", "bullet_points"]))
+
+    assert result["texts"] == {"detailed": "Long.", "brief": "Short on its own.", "bullet_points": "- one"}
+    assert len(prompts) == 2
+    assert prompts[1].startswith("Provide a concise 2-3 paragraph summary")
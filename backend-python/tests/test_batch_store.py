@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.batch_service import InMemoryJobStore, SharedJobStore
+from app.utils.shared_state import LocalSharedState, SQLiteSharedState
+
+
+def new_job(job_id: str, count: int) -> dict:
+    now = time.time()
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "summary_type": "brief",
+        "total": count,
+        "completed": 0,
+        "failed": 0,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+        "items": [
+            {"index": i, "video_url": f"https://youtu.be/{i:011d}", "status": "pending", "result": None, "error": None}
+            for i in range(count)
+        ]
+    }
+
+
+@pytest.fixture(params=["memory", "local", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryJobStore()
+        return
+    shared_state = LocalSharedState() if request.param == "local" else SQLiteSharedState(str(tmp_path / "state.db"))
+    yield SharedJobStore(shared_state, ttl=60)
+    shared_state.close()
+
+
+def test_item_updates_keep_counters_and_order(store):
+    async def run():
+        await store.create(new_job("job1", 12))
+        await store.update_item("job1", 0, status="running")
+        await store.update_item("job1", 0, status="succeeded", result={"summary": "first"})
+        await store.update_item("job1", 11, status="failed", error="boom")
+        return await store.get("job1")
+
+    job = asyncio.run(run())
+    assert job["status"] == "running"
+    assert (job["completed"], job["failed"]) == (1, 1)
+    assert [item["index"] for item in job["items"]] == list(range(12))
+    assert job["items"][0]["result"] == {"summary": "first"}
+    assert job["items"][11]["error"] == "boom"
+    assert job["items"][5]["status"] == "pending"
+
+
+def test_job_completes_when_every_item_finishes(store):
+    async def run():
+        await store.create(new_job("job2", 2))
+        await store.update_item("job2", 0, status="succeeded", result={})
+        await store.update_item("job2", 1, status="failed", error="x")
+        return await store.get("job2")
+
+    job = asyncio.run(run())
+    assert job["status"] == "completed"
+    assert job["finished_at"] is not None
+
+
+def test_unknown_job(store):
+    assert asyncio.run(store.get("missing")) is None
@@ -0,0 +1,27 @@
+from app.services.model_router import TIER_STANDARD, ModelRouter
+
+
+def test_single_model_routes_to_standard_and_keeps_plain_cache_tag():
+    router = ModelRouter("gemini-2.5-flash", "gemini-2.5-flash", "gemini-2.5-flash")
+
+    route = router.route(100, "brief")
+    assert route.models == ["gemini-2.5-flash"]
+    assert router.cache_tag() == "gemini-2.5-flash"
+
+
+def test_cache_tag_changes_with_the_model_set_and_thresholds():
+    tiered = ModelRouter("gemini-2.5-flash", "gemini-2.5-flash-lite", "gemini-2.5-flash")
+    other_light = ModelRouter("gemini-2.5-flash", "gemini-2.0-flash-lite", "gemini-2.5-flash")
+    other_threshold = ModelRouter("gemini-2.5-flash", "gemini-2.5-flash-lite", "gemini-2.5-flash", light_max_tokens=4000)
+
+    tags = {"gemini-2.5-flash", tiered.cache_tag(), other_light.cache_tag(), other_threshold.cache_tag()}
+    assert len(tags) == 4
+
+
+def test_disabled_router_uses_standard_model_only():
+    router = ModelRouter("gemini-2.5-flash", "gemini-2.5-flash-lite", "gemini-2.5-pro", enabled=False)
+
+    route = router.route(100, "brief")
+    assert route.tier == TIER_STANDARD
+    assert route.models == ["gemini-2.5-flash"]
+    assert router.cache_tag() == "gemini-2.5-flash"
@@ -0,0 +1,41 @@
+import asyncio
+import sqlite3
+
+from app.utils.rate_limiter import RateLimiter
+from app.utils.shared_state import LocalSharedState
+
+
+class FlakySharedState(LocalSharedState):
+    """Shared state whose first take_tokens calls fail like a locked SQLite database"""
+
+    shared_across_processes = True
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def take_tokens(self, buckets):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return super().take_tokens(buckets)
+
+
+def acquire_all(limiter: RateLimiter, count: int, timeout: float = 3.0):
+    async def run():
+        await asyncio.wait_for(asyncio.gather(*(limiter.acquire(10) for _ in range(count))), timeout)
+    asyncio.run(run())
+
+
+def test_acquire_survives_transient_shared_state_error():
+    shared_state = FlakySharedState(failures=1)
+    limiter = RateLimiter(6000, 1000000, shared_state=shared_state)
+    acquire_all(limiter, 3)
+    assert limiter.granted == 3
+    assert shared_state.failures == 0
+
+
+def test_acquire_falls_back_to_local_buckets_when_shared_state_keeps_failing():
+    limiter = RateLimiter(6000, 1000000, shared_state=FlakySharedState(failures=1000))
+    acquire_all(limiter, 3)
+    assert limiter.granted == 3
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.utils.shared_state import LocalSharedState, SQLiteSharedState
+from app.utils.single_flight import SingleFlight
+
+
+class LeasedLocalSharedState(LocalSharedState):
+    """Local state treated as cross-process so SingleFlight takes the leased lock"""
+
+    shared_across_processes = True
+
+
+@pytest.fixture(params=["memory", "local", "sqlite"])
+def new_worker(request, tmp_path):
+    """
+    Factory for SingleFlight instances standing in for separate worker
+    processes: "memory" keeps coalescing in-process only, "local" and
+    "sqlite" share one lock table (a connection per worker for SQLite)
+    """
+    states = []
+    local_state = LeasedLocalSharedState() if request.param == "local" else LocalSharedState()
+
+    def new(name: str = "test") -> SingleFlight:
+        if request.param == "sqlite":
+            state = SQLiteSharedState(str(tmp_path / "state.db"))
+            states.append(state)
+        else:
+            state = local_state
+        return SingleFlight(name, shared_state=state, lock_ttl=5, poll_interval=0.01)
+
+    new.cross_process = request.param != "memory"
+    yield new
+    for state in states:
+        state.close()
+
+
+def test_concurrent_callers_share_one_execution(new_worker):
+    flight = new_worker()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"summary": "done"}
+
+    async def run():
+        return await asyncio.gather(*(flight.do("video-1", work) for _ in range(10)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(result is results[0][0] for result, _ in results)
+    assert sorted(shared for _, shared in results) == [False] + [True] * 9
+    stats = flight.stats()
+    assert (stats["leaders"], stats["coalesced"], stats["in_flight"]) == (1, 9, 0)
+
+
+def test_failure_reaches_every_waiter_and_is_cleaned_up(new_worker):
+    flight = new_worker()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream failed")
+
+    async def succeeding():
+        calls.append(1)
+        return "ok"
+
+    async def run():
+        errors = await asyncio.gather(*(flight.do("video-1", failing) for _ in range(5)), return_exceptions=True)
+        # The failed call is gone: the next caller runs again instead of getting the stale error
+        retry = await flight.do("video-1", succeeding)
+        return errors, retry
+
+    errors, retry = asyncio.run(run())
+
+    assert all(isinstance(error, RuntimeError) and error is errors[0] for error in errors)
+    assert retry == ("ok", False)
+    assert len(calls) == 2
+    stats = flight.stats()
+    assert (stats["failures"], stats["in_flight"]) == (1, 0)
+    if new_worker.cross_process:
+        # The lease was released despite the failure
+        assert flight.shared_state.acquire_lock("test:video-1", "someone-else", 5)
+
+
+def test_other_worker_waits_for_the_lease_and_reuses_its_result(new_worker):
+    if not new_worker.cross_process:
+        pytest.skip("separate workers only coordinate through cross-process shared state")
+    first, second = new_worker(), new_worker()
+    finished = {}
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        finished["video-1"] = "summary"
+        return "summary"
+
+    async def lookup():
+        return finished.get("video-1")
+
+    async def run():
+        leader = asyncio.ensure_future(first.do("video-1", work, lookup))
+        await asyncio.sleep(0.02)
+        follower = await second.do("video-1", work, lookup)
+        return await leader, follower
+
+    leader, follower = asyncio.run(run())
+
+    assert leader == ("summary", False)
+    assert follower == ("summary", False)
+    assert len(calls) == 1
+    assert second.stats()["remote_waits"] == 1
@@ -0,0 +1,87 @@
+from app.utils.transcript import Transcript
+from app.utils.transcript_normalizer import TranscriptNormalizer
+
+
+def normalize(segments, **options):
+    transcript = Transcript.from_segments(
+        {"start": start, "duration": duration, "text": text} for start, duration, text in segments
+    )
+    cleaned, _ = TranscriptNormalizer(**options).normalize(transcript)
+    return cleaned.texts
+
+
+def test_keeps_repeated_words_across_manual_captions():
+    assert normalize([
+        (0.0, 2.0, "It is what it is"),
+        (2.0, 2.0, "it is what we make of it"),
+    ]) == ["It is what it is", "it is what we make of it"]
+
+
+def test_keeps_split_sentence_across_manual_captions():
+    assert normalize([
+        (0.0, 2.0, "We need to go to the"),
+        (2.0, 2.0, "to the store now"),
+    ]) == ["We need to go to the", "to the store now"]
+
+
+def test_keeps_genuinely_repeated_line():
+    assert normalize([
+        (0.0, 2.0, "I really like it."),
+        (2.5, 2.0, "I really like it."),
+    ]) == ["I really like it.", "I really like it."]
+
+
+def test_removes_overlap_of_rolling_captions():
+    assert normalize([
+        (0.0, 4.0, "so the idea here is"),
+        (2.0, 4.0, "idea here is that we keep"),
+        (4.0, 4.0, "that we keep"),
+        (6.0, 4.0, "that we keep the cache warm"),
+    ]) == ["so the idea here is", "that we keep", "the cache warm"]
+
+
+def test_rolling_single_word_overlap_is_kept():
+    assert normalize([
+        (0.0, 4.0, "at the end of the"),
+        (2.0, 4.0, "the day we ship"),
+    ]) == ["at the end of the", "the day we ship"]
+
+
+def test_dedupe_disabled_keeps_rolling_captions():
+    assert normalize([
+        (0.0, 4.0, "so the idea here is"),
+        (2.0, 4.0, "idea here is that"),
+    ], dedupe=False) == ["so the idea here is", "idea here is that"]
+
+
+def test_strips_standalone_fillers():
+    assert normalize([(0.0, 2.0, "um so uh, the plan is hmm simple")]) == ["so the plan is simple"]
+
+
+def test_keeps_hyphenated_backchannel():
+    assert normalize([(0.0, 2.0, "mm-hmm right")]) == ["mm-hmm right"]
+
+
+def test_strips_markers():
+    assert normalize([
+        (0.0, 2.0, "[Music]"),
+        (2.0, 2.0, "welcome back (applause) everyone"),
+    ]) == ["welcome back everyone"]
+
+
+def test_keeps_units_and_strips_lone_mm():
+    assert normalize([
+        (0.0, 2.0, "use a 5 mm drill bit"),
+        (2.0, 2.0, "Mmm."),
+    ]) == ["use a 5 mm drill bit"]
+
+
+def test_keeps_code_like_and_editorial_brackets():
+    assert normalize([(0.0, 2.0, "array[0] is [sic] fine")]) == ["array[0] is [sic] fine"]
+
+
+def test_strips_known_markers_only():
+    assert normalize([
+        (0.0, 2.0, "[Laughter] that was [ __ ] great [Inaudible]"),
+        (2.0, 2.0, "see [figure 2] (music playing)"),
+    ]) == ["that was great", "see [figure 2]"]
@@ -0,0 +1,39 @@
+import json
+import zlib
+
+from app.services.transcript_store import FORMAT_VERSION, TranscriptStore
+from app.utils.transcript import Transcript
+
+
+def transcript() -> Transcript:
+    return Transcript.from_rows([[0.0, 2.0, "hello there"], [2.0, 2.0, "general kenobi"]], language="en")
+
+
+def test_round_trip_keeps_metadata(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    store.put("abc123", "A title", 95, "thumb.jpg", transcript())
+
+    stored = store.get("abc123", ["en"])
+    assert stored["title"] == "A title"
+    assert stored["duration"] == 95
+    assert stored["metadata_complete"] is True
+    assert stored["transcript"].rows() == transcript().rows()
+
+
+def test_placeholder_metadata_is_flagged(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    store.put("abc123", "YouTube Video", 0, "thumb.jpg", transcript(), metadata_complete=False)
+
+    assert store.get("abc123", ["en"])["metadata_complete"] is False
+
+
+def test_entries_without_flag_with_zero_duration_are_incomplete(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    record = {
+        "v": FORMAT_VERSION, "video_id": "abc123", "language": "en", "title": "YouTube Video",
+        "duration": 0, "thumbnail": "thumb.jpg", "chapters": [], "segments": transcript().rows()
+    }
+    with open(store._path("abc123", "en"), "wb") as f:
+        f.write(zlib.compress(json.dumps(record).encode("utf-8")))
+
+    assert store.get("abc123", ["en"])["metadata_complete"] is False